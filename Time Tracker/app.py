@@ -1,4 +1,9 @@
+import os
+import time
 import streamlit as st
+from core.logging import WRITE_BEHIND, write_queue
+from core.workspaces import DEFAULT_WORKSPACE, set_workspace
+from utils.profiling import PROFILING, span, start_trace
 
 # -------------------------
 # Import UI modules
@@ -6,12 +11,16 @@ import streamlit as st
 from ui.timer_tab import show_timer_tab
 from ui.logs_tab import show_logs_tab
 from ui.analytics_tab import show_analytics_tab
+from ui.profile_panel import show_profile_panel
 
 # -------------------------
 # Page config
 # -------------------------
 st.set_page_config(page_title="Time Tracker", layout="wide")
 
+# Spans of this run, when TIME_TRACKER_PROFILE is set (see utils.profiling)
+trace = start_trace()
+
 # -------------------------
 # Sidebar content
 # -------------------------
@@ -25,6 +34,25 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
+# -------------------------
+# Workspace: each one has its own logs (?workspace=name in the URL)
+# -------------------------
+if "workspace" not in st.session_state:
+    st.session_state.workspace = st.query_params.get("workspace", DEFAULT_WORKSPACE)
+
+st.sidebar.text_input("Workspace", key="workspace")
+
+try:
+    st.session_state.active_workspace = set_workspace(st.session_state.workspace.strip())
+except ValueError as error:
+    st.sidebar.error(str(error))
+    st.session_state.active_workspace = set_workspace(None)
+
+if st.session_state.active_workspace == DEFAULT_WORKSPACE:
+    st.query_params.pop("workspace", None)
+else:
+    st.query_params["workspace"] = st.session_state.active_workspace
+
 # Flexible whitespace
 st.sidebar.markdown("<br><br><br>", unsafe_allow_html=True)
 
@@ -64,15 +92,70 @@ if "end_time" not in st.session_state:
     st.session_state.end_time = None
 
 # -------------------------
-# App layout (tabs only)
+# App layout
 # -------------------------
-tabs = st.tabs(["Timer", "Logs", "Analytics"])
+VIEWS = {
+    "Timer": show_timer_tab,
+    "Logs": show_logs_tab,
+    "Analytics": show_analytics_tab,
+}
+
+# Lazy mode only runs the selected view; set to 0 to render all tabs
+LAZY_VIEWS = os.environ.get("TIME_TRACKER_LAZY_VIEWS", "1") == "1"
+
+if "render_timings" not in st.session_state:
+    st.session_state.render_timings = {}
+
 
-with tabs[0]:
-    show_timer_tab()
+def render_view(name: str) -> None:
+    """Run a view and record how long it took, in milliseconds."""
+    started = time.perf_counter()
+    with span(name, "view"):
+        VIEWS[name]()
+    st.session_state.render_timings[name] = (time.perf_counter() - started) * 1000
 
-with tabs[1]:
-    show_logs_tab()
 
-with tabs[2]:
-    show_analytics_tab()
+if LAZY_VIEWS:
+    # The selected view lives in the URL (?tab=Logs) so it can be linked
+    requested = st.query_params.get("tab", "Timer")
+    if requested not in VIEWS:
+        requested = "Timer"
+
+    selected = st.radio(
+        "View",
+        list(VIEWS),
+        index=list(VIEWS).index(requested),
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+    st.query_params["tab"] = selected
+
+    render_view(selected)
+else:
+    for tab, name in zip(st.tabs(list(VIEWS)), VIEWS):
+        with tab:
+            render_view(name)
+
+# -------------------------
+# Render timings (last run of each view)
+# -------------------------
+st.sidebar.caption(
+    "Render time: " + " · ".join(
+        f"{name} {ms:.0f} ms" for name, ms in st.session_state.render_timings.items()
+    )
+)
+
+if WRITE_BEHIND:
+    queue = write_queue().stats()
+    st.sidebar.caption(
+        f"Write queue: {queue['pending']} pending · {queue['written']} written "
+        f"in {queue['batches']} batches · last flush {queue['last_flush_ms']:.0f} ms"
+        + (f" · {queue['errors']} errors" if queue["errors"] else "")
+    )
+
+# -------------------------
+# Profiler (TIME_TRACKER_PROFILE=1)
+# -------------------------
+if PROFILING:
+    trace.finish()
+    show_profile_panel(trace)
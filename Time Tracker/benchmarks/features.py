@@ -0,0 +1,54 @@
+"""
+Microbenchmark: local-time features via core.features vs. the per-column
+.dt accessors the Analytics tab used before.
+
+Usage (from the Time Tracker directory):
+    python -m benchmarks.features
+    python -m benchmarks.features --rows 100000 1000000
+"""
+import argparse
+import pandas as pd
+from benchmarks.storage_backends import time_call
+from benchmarks.synthetic import make_logs
+from core.features import derive_features
+from utils.time_utils import DISPLAY_TIMEZONE
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+
+def legacy_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The original analytics derivations, kept for comparison."""
+    df = df.copy()
+    df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
+    df['start_time_local'] = (
+        df['start_time']
+        .dt.tz_convert(DISPLAY_TIMEZONE)
+        .dt.tz_localize(None)
+    )
+    df['local_date'] = df['start_time_local'].dt.date
+    df['weekday'] = df['start_time_local'].dt.day_name()
+    df['hour_float'] = (
+        df['start_time_local'].dt.hour +
+        df['start_time_local'].dt.minute / 60 +
+        df['start_time_local'].dt.second / 3600
+    )
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark time-of-day feature derivation.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+
+    for rows in args.rows:
+        df = make_logs(rows)
+        legacy = time_call(lambda: legacy_features(df), args.repeat)
+        vectorized = time_call(lambda: derive_features(df["start_time"]), args.repeat)
+        print(f"{rows:>10} {legacy:>12.3f} {vectorized:>15.3f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare load/save latency of the storage backends.
+
+Usage (from the Time Tracker directory):
+    python -m benchmarks.storage_backends
+    python -m benchmarks.storage_backends --rows 10000 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import make_logs
+from core.backends import BACKENDS, get_backend
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+
+def time_call(func, repeat: int) -> float:
+    """Best wall-clock time of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def disk_bytes(backend) -> int:
+    """Bytes the backend stores: every file of its snapshot, partitions included."""
+    if backend.path.is_dir():
+        files = [path for path in backend.path.rglob("*") if path.is_file()]
+    else:
+        files = [path for path in backend.files() if path.exists()]
+    return sum(path.stat().st_size for path in files)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark time log storage backends.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'backend':>8} {'save (s)':>10} {'load (s)':>10} {'size (MB)':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            df = make_logs(rows)
+
+            for name in args.backends:
+                backend = get_backend(name, Path(tmp))
+                save = time_call(lambda: backend.write(df), args.repeat)
+                load = time_call(backend.read, args.repeat)
+                size = disk_bytes(backend) / 1e6
+
+                print(f"{rows:>10} {name:>8} {save:>10.3f} {load:>10.3f} {size:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
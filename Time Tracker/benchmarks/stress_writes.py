@@ -0,0 +1,115 @@
+"""
+Log sessions from several processes at once and check none are lost.
+
+Every worker logs its own sessions plus some into a shared same-day row,
+with a small compaction threshold so compactions race with appends. The
+analytics rollups are built first, so every write also patches them;
+their totals must match the logs at the end.
+
+Usage (from the Time Tracker directory):
+    python -m benchmarks.stress_writes
+    python -m benchmarks.stress_writes --processes 8 --sessions 200 --backend sqlite
+    python -m benchmarks.stress_writes --mode rewrite
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from core.backends import BACKENDS
+
+DAY = datetime(2024, 1, 1, 9)
+
+
+def session(worker: int, index: int) -> tuple[str, datetime, datetime]:
+    """Activity and times of one session; every 4th goes to the shared row."""
+    activity = "Shared" if index % 4 == 0 else f"Worker {worker}"
+    start = DAY + timedelta(days=index % 3, minutes=index)
+    return activity, start, start + timedelta(seconds=60 + worker)
+
+
+def run_worker(worker: int, sessions: int) -> None:
+    from core.logging import log_activity
+
+    for index in range(sessions):
+        activity, start, end = session(worker, index)
+        log_activity(activity, "Work", "Focused", start, end)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stress concurrent time log writes.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=100, help="sessions per process")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="csv")
+    parser.add_argument("--mode", choices=["journal", "rewrite"], default="journal")
+    args = parser.parse_args()
+
+    # Inherited by the workers before they import core.storage
+    os.environ["TIME_TRACKER_BACKEND"] = args.backend
+    os.environ["TIME_TRACKER_STORAGE_MODE"] = args.mode
+    os.environ["TIME_TRACKER_COMPACT_THRESHOLD_BYTES"] = "4096"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TIME_TRACKER_DATA_DIR"] = tmp
+
+        # Workers patch the rollups incrementally only once they exist
+        from core.rollups import ensure_rollups
+        ensure_rollups()
+
+        started = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(worker, args.sessions))
+            for worker in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        seconds = time.perf_counter() - started
+
+        failed = [worker for worker, process in enumerate(workers) if process.exitcode != 0]
+        if failed:
+            sys.exit(f"Workers {failed} failed")
+
+        from core.rollups import load_rollups, rollup_date_range, rollups_in_sync
+        from core.storage import load_logs
+
+        df = load_logs()
+        bounds = rollup_date_range()
+        rollup_seconds = load_rollups(*bounds)["daily"]["seconds"].sum() if bounds else 0
+        in_sync = rollups_in_sync()
+        expected_seconds = sum(
+            (end - start).total_seconds()
+            for worker in range(args.processes)
+            for _, start, end in (session(worker, i) for i in range(args.sessions))
+        )
+        expected_rows = len({
+            (activity, start.date())
+            for worker in range(args.processes)
+            for activity, start, _ in (session(worker, i) for i in range(args.sessions))
+        })
+
+        total = args.processes * args.sessions
+        print(f"{total} sessions from {args.processes} processes in {seconds:.2f}s "
+              f"({total / seconds:.0f}/s), backend={args.backend}, mode={args.mode}")
+        print(f"rows: {len(df)} (expected {expected_rows}), "
+              f"seconds: {df['duration_seconds'].sum()} (expected {expected_seconds:.0f}), "
+              f"duplicate ids: {int(df['id'].duplicated().sum())}")
+        print(f"rollups: {rollup_seconds} seconds, in sync: {in_sync}")
+
+        ok = (
+            len(df) == expected_rows
+            and df["duration_seconds"].sum() == expected_seconds
+            and not df["id"].duplicated().any()
+        )
+        if not ok:
+            sys.exit("Lost or duplicated sessions")
+        if rollup_seconds != df["duration_seconds"].sum():
+            sys.exit("Rollups do not match the logs")
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Benchmark suite for the Time Tracker data paths.
+
+Times loading, saving, logging, the analytics aggregations and the Logs
+tab at several sizes of synthetic logs, in a throwaway data directory.
+Results are written as JSON (to benchmarks/results/ by default) and
+compared with a stored baseline; the run fails if a step got slower than
+the threshold allows.
+
+Usage (from the Time Tracker directory):
+    python -m benchmarks.suite --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.suite                      # compare against it
+    python -m benchmarks.suite --rows 1000 10000 --backend sqlite --threshold 2
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from benchmarks.storage_backends import time_call
+from benchmarks.synthetic import make_logs
+from core import storage, workspaces
+from core.backends import BACKENDS
+from core.logging import log_activity
+from core.rollups import load_rollups, rebuild_rollups, rollup_date_range
+from core.workspaces import use_workspace
+from ui.logs_tab import PAGE_SIZE, format_duration
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+# Default output of a run (the directory is not versioned)
+RESULTS_FILE = Path(__file__).with_name("results") / "benchmark_results.json"
+
+# A step fails the comparison when it takes this many times its baseline
+DEFAULT_THRESHOLD = 1.5
+
+# Steps faster than this are too noisy to compare
+MIN_SECONDS = 0.002
+
+# Size of the untimed warm-up run
+WARMUP_ROWS = 500
+
+# Sessions logged per log_activity measurement
+LOG_ACTIVITY_CALLS = 20
+
+
+def run_size(rows: int, repeat: int) -> dict[str, float]:
+    """
+    Time every step against `rows` synthetic logs in the current workspace.
+
+    Returns:
+        dict[str, float]: Best time of each step, in seconds
+    """
+    activities = 50
+    df = make_logs(rows, activities=activities, days=max(-(-rows // activities), rows // 20))
+    timings = {}
+
+    def cold(func):
+        def call():
+            storage.invalidate_cache()
+            return func()
+        return call
+
+    # Storage
+    timings["save_logs"] = time_call(lambda: storage.save_logs(df), repeat)
+    timings["load_logs_cold"] = time_call(cold(storage.load_logs), repeat)
+    timings["load_logs_warm"] = time_call(storage.load_logs, repeat)
+
+    # Analytics
+    timings["rebuild_rollups"] = time_call(rebuild_rollups, repeat)
+    first, last = rollup_date_range()
+    timings["load_rollups"] = time_call(lambda: load_rollups(first, last), repeat)
+
+    # Logs tab: one page from the middle, formatted like the tab does
+    def logs_page(filters=None):
+        page, total = storage.query_logs(filters, offset=rows // 2, limit=PAGE_SIZE)
+        return [format_duration(seconds) for seconds in page["duration_seconds"]]
+
+    timings["logs_page"] = time_call(logs_page, repeat)
+    timings["logs_page_filtered"] = time_call(lambda: logs_page({"mood": "Happy"}), repeat)
+    timings["export_csv_cold"] = time_call(cold(storage.export_logs_csv), repeat)
+
+    # Writes: mean per session, with the rollups in sync so they are patched
+    last_day = pd.Timestamp(df["start_time"].max()).to_pydatetime()
+
+    def log_sessions():
+        for i in range(LOG_ACTIVITY_CALLS):
+            start = last_day.replace(hour=8) + pd.Timedelta(minutes=i)
+            log_activity(f"Activity {i % 5}", "Work", "Focused", start, start + pd.Timedelta(minutes=1))
+
+    timings["log_activity"] = time_call(log_sessions, repeat) / LOG_ACTIVITY_CALLS
+    timings["compact_logs"] = time_call(storage.compact_logs, 1)
+
+    return timings
+
+
+@contextmanager
+def temporary_data(backend: str):
+    """Point every workspace at a throwaway directory and `backend`, then restore both."""
+    data_root, storage_backend = workspaces.DATA_ROOT, storage.STORAGE_BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        workspaces.DATA_ROOT = Path(tmp)
+        storage.STORAGE_BACKEND = backend
+        try:
+            yield
+        finally:
+            workspaces.DATA_ROOT, storage.STORAGE_BACKEND = data_root, storage_backend
+
+
+def run_suite(rows_list: list[int], repeat: int, backend: str) -> dict:
+    """
+    Run every size in a temporary data directory.
+
+    Returns:
+        dict: "meta" (environment) and "results" keyed by row count, then step
+    """
+    results = {}
+    with temporary_data(backend):
+        # Untimed pass so import and first-call costs do not land on a step
+        with use_workspace("warmup"):
+            run_size(WARMUP_ROWS, 1)
+
+        for rows in rows_list:
+            with use_workspace(f"rows-{rows}"):
+                results[str(rows)] = run_size(rows, repeat)
+            print(f"  {rows:>10} rows done", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "backend": backend,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[tuple]:
+    """
+    Compare results step by step.
+
+    Returns:
+        list[tuple]: (rows, step, baseline s, current s, ratio, regressed)
+            for every step present in both
+    """
+    rows = []
+    for size, steps in current["results"].items():
+        for step, seconds in steps.items():
+            base = baseline["results"].get(size, {}).get(step)
+            if base is None:
+                continue
+            ratio = seconds / base if base else float("inf")
+            regressed = ratio > threshold and seconds >= MIN_SECONDS
+            rows.append((size, step, base, seconds, ratio, regressed))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Time Tracker data paths.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=list(BACKENDS), default="csv")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE,
+                        help="where to write this run's JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fail when a step takes more than this times its baseline")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline instead of comparing")
+    args = parser.parse_args()
+
+    report = run_suite(args.rows, args.repeat, args.backend)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        for size, steps in report["results"].items():
+            for step, seconds in steps.items():
+                print(f"{size:>10} {step:<20} {seconds * 1000:>10.2f} ms")
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    rows = compare(report, baseline, args.threshold)
+
+    print(f"{'rows':>10} {'step':<20} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for size, step, base, seconds, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{size:>10} {step:<20} {base * 1000:>12.2f} {seconds * 1000:>12.2f} {ratio:>6.2f}x{flag}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        sys.exit(f"{len(regressions)} step(s) slower than {args.threshold}x the baseline")
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from core.schema import CATEGORIES, MOODS
+from core.storage import COLUMNS
+from utils.time_utils import get_periods, get_time_blocks
+
+# ============================
+# Synthetic time logs
+# ============================
+
+
+def make_logs(
+    rows: int,
+    activities: int = 50,
+    start: str = "2020-01-01",
+    seed: int = 0,
+    days: int | None = None,
+    moods: list[str] | None = None,
+    categories: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Generate a logs DataFrame shaped like the one load_logs returns.
+
+    Every (activity, date) appears at most once, as after same-day merging.
+
+    Args:
+        rows (int): Number of rows
+        activities (int): Number of distinct activity names
+        start (str): Date of the earliest session
+        seed (int): Random seed, for reproducible runs
+        days (int | None): Spread the rows over this many days at random;
+            by default each day is filled with every activity in turn
+        moods (list[str] | None): Mood labels, defaults to MOODS
+        categories (list[str] | None): Category labels, defaults to CATEGORIES
+
+    Returns:
+        pd.DataFrame: Synthetic logs in COLUMNS order
+
+    Raises:
+        ValueError: If `rows` does not fit in `days` * `activities`
+    """
+    rng = np.random.default_rng(seed)
+
+    if days is None:
+        # Spread sessions over enough days that (activity, date) stays unique
+        days = max(1, -(-rows // activities))
+        day = np.repeat(np.arange(days), activities)[:rows]
+        activity = np.tile(np.arange(activities), days)[:rows]
+    else:
+        if rows > days * activities:
+            raise ValueError(
+                f"{rows} rows do not fit in {days} days x {activities} activities"
+            )
+        slot = np.sort(rng.choice(days * activities, rows, replace=False))
+        day, activity = np.divmod(slot, activities)
+
+    start_time = (
+        pd.Timestamp(start)
+        + pd.to_timedelta(day, unit="D")
+        + pd.to_timedelta(rng.integers(0, 24 * 3600, rows), unit="s")
+    )
+    duration = rng.integers(60, 4 * 3600, rows)
+    start_hour = start_time.hour.to_numpy()
+
+    df = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "start_time": start_time,
+        "end_time": start_time + pd.to_timedelta(duration, unit="s"),
+        "duration_seconds": duration,
+        "activity": [f"Activity {a}" for a in activity],
+        "category": rng.choice(categories or CATEGORIES, rows),
+        "mood": rng.choice(moods or MOODS, rows),
+        "start_hour": start_hour,
+        "time_block": np.asarray(get_time_blocks(start_hour)),
+        "period": np.asarray(get_periods(start_hour)),
+        "date": start_time.strftime("%Y-%m-%d"),
+        "month": start_time.month,
+        "year": start_time.year,
+    })
+
+    return df[COLUMNS]
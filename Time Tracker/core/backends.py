@@ -0,0 +1,580 @@
+import calendar
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+from core.schema import enforce_schema
+
+# ============================
+# Storage backends
+# ============================
+#
+# A backend persists the full logs snapshot in one file format.
+# core.storage picks one by name and layers the journal on top of it.
+# File backends write to a temporary file and rename it into place, so a
+# crash mid-write never leaves a truncated snapshot behind.
+
+# Mirrors core.storage.COLUMNS (backends cannot import storage)
+FIELDS = [
+    "id", "start_time", "end_time", "duration_seconds",
+    "activity", "category", "mood",
+    "start_hour", "time_block", "period",
+    "date", "month", "year",
+]
+
+
+class StorageBackend:
+    """
+    Base class for a logs snapshot stored in a single file.
+    Subclasses implement _read() and write().
+    """
+
+    name: str = ""
+    suffix: str = ""
+
+    # Backends that merge same-day sessions and delete rows in place skip
+    # the journal and tombstones (see upsert_many() and delete())
+    supports_upsert: bool = False
+
+    # Backends whose write() accepts `months` to rewrite only some partitions
+    partitioned: bool = False
+
+    # Backends that filter, sort and paginate themselves (see query())
+    supports_query: bool = False
+
+    def __init__(self, data_dir: Path, stem: str = "time_logs"):
+        self.path = data_dir / f"{stem}{self.suffix}"
+
+    def exists(self) -> bool:
+        """Whether the snapshot file has been created."""
+        return self.path.exists()
+
+    def files(self) -> list[Path]:
+        """Every file whose changes affect what read() returns."""
+        return [self.path]
+
+    def read(self, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        """
+        Read the snapshot, optionally only rows dated within [start, end].
+
+        Args:
+            start (date | None): First date to include
+            end (date | None): Last date to include
+
+        Returns:
+            pd.DataFrame: Logs rows
+        """
+        return filter_dates(self._read(), start, end)
+
+    def _read(self) -> pd.DataFrame:
+        """Read the full snapshot."""
+        raise NotImplementedError
+
+    def iter_chunks(
+        self,
+        chunksize: int,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read the snapshot in chunks of at most `chunksize` rows.
+
+        This default slices a full read(); backends that can stream
+        override it so memory stays bounded by the chunk size.
+        """
+        df = self.read(start, end)
+        for offset in range(0, len(df), chunksize):
+            yield df.iloc[offset:offset + chunksize].reset_index(drop=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Replace the snapshot with `df`."""
+        raise NotImplementedError
+
+
+class CSVBackend(StorageBackend):
+    """
+    Plain CSV snapshot (the default).
+    Datetimes are parsed on every read.
+    """
+
+    name = "csv"
+    suffix = ".csv"
+
+    def _read(self) -> pd.DataFrame:
+        return parse_timestamps(pd.read_csv(self.path))
+
+    def iter_chunks(self, chunksize, start=None, end=None):
+        with pd.read_csv(self.path, chunksize=chunksize) as reader:
+            for chunk in reader:
+                chunk = filter_dates(parse_timestamps(chunk), start, end)
+                if not chunk.empty:
+                    yield chunk
+
+    def write(self, df: pd.DataFrame) -> None:
+        with atomic_path(self.path) as tmp:
+            df.to_csv(tmp, index=False)
+
+
+class ColumnarBackend(StorageBackend):
+    """
+    Typed columnar snapshot (Parquet or Feather, requires pyarrow).
+
+    Columns are stored in the core.schema dtypes (datetime64 timestamps
+    and dates, categorical labels, small ints), so nothing is parsed on read.
+    """
+
+    format: str = ""
+
+    def _read(self) -> pd.DataFrame:
+        if self.format == "parquet":
+            return pd.read_parquet(self.path)
+        return pd.read_feather(self.path)
+
+    def iter_chunks(self, chunksize, start=None, end=None):
+        if self.format != "parquet":
+            yield from super().iter_chunks(chunksize, start, end)
+            return
+
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize):
+            chunk = filter_dates(batch.to_pandas(), start, end)
+            if not chunk.empty:
+                yield chunk
+
+    def write(self, df: pd.DataFrame) -> None:
+        df = enforce_schema(df)
+        with atomic_path(self.path) as tmp:
+            if self.format == "parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_feather(tmp)
+
+
+class ParquetBackend(ColumnarBackend):
+    name = "parquet"
+    suffix = ".parquet"
+    format = "parquet"
+
+
+class FeatherBackend(ColumnarBackend):
+    name = "feather"
+    suffix = ".feather"
+    format = "feather"
+
+
+# Database files whose schema this process has created (see SQLiteBackend)
+_sqlite_schema_lock = threading.Lock()
+_sqlite_schema_ready: set[Path] = set()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite database in WAL mode, safe for concurrent Streamlit sessions.
+
+    A unique index on (activity, date) lets upsert_many() merge a same-day
+    session with one indexed statement, and ids come from AUTOINCREMENT
+    so they are never reused after deletes.
+    """
+
+    name = "sqlite"
+    suffix = ".db"
+    supports_upsert = True
+    supports_query = True
+
+    TABLE = "time_logs"
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            duration_seconds INTEGER NOT NULL,
+            activity TEXT NOT NULL,
+            category TEXT,
+            mood TEXT,
+            start_hour INTEGER,
+            time_block TEXT,
+            period TEXT,
+            date TEXT NOT NULL,
+            month INTEGER,
+            year INTEGER
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_{TABLE}_activity_date
+            ON {TABLE} (activity, date);
+        CREATE INDEX IF NOT EXISTS idx_{TABLE}_date
+            ON {TABLE} (date);
+        CREATE INDEX IF NOT EXISTS idx_{TABLE}_start_time
+            ON {TABLE} (start_time);
+    """
+
+    UPSERT = f"""
+        INSERT INTO {TABLE} ({", ".join(FIELDS)})
+        VALUES ({", ".join("?" for _ in FIELDS)})
+        ON CONFLICT (activity, date) DO UPDATE
+        SET duration_seconds = duration_seconds + excluded.duration_seconds
+    """
+
+    def files(self) -> list[Path]:
+        # Commits land in the write-ahead log until it is checkpointed
+        return [self.path, self.path.with_name(self.path.name + "-wal")]
+
+    def read(self, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        query, params = self._select(start, end)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                query, conn, params=params, parse_dates=["start_time", "end_time"]
+            )
+
+    def iter_chunks(self, chunksize, start=None, end=None):
+        query, params = self._select(start, end)
+        with self._connect() as conn:
+            yield from pd.read_sql_query(
+                query,
+                conn,
+                params=params,
+                parse_dates=["start_time", "end_time"],
+                chunksize=chunksize,
+            )
+
+    def query(
+        self,
+        filters: dict,
+        start: date | None,
+        end: date | None,
+        offset: int,
+        limit: int,
+    ) -> tuple[pd.DataFrame, int]:
+        """
+        One page of rows matching `filters`, newest first.
+
+        Args:
+            filters (dict): Exact-match values keyed by column name
+            start (date | None): First date to include
+            end (date | None): Last date to include
+            offset (int): Rows to skip
+            limit (int): Page size
+
+        Returns:
+            tuple[pd.DataFrame, int]: The page and the total number of matches
+        """
+        where, params = self._where(start, end, filters)
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.TABLE} {where}", params).fetchone()[0]
+            page = pd.read_sql_query(
+                f"SELECT * FROM {self.TABLE} {where} "
+                "ORDER BY start_time DESC, id DESC LIMIT ? OFFSET ?",
+                conn,
+                params=[*params, limit, offset],
+                parse_dates=["start_time", "end_time"],
+            )
+
+        return page, total
+
+    def distinct(self, column: str) -> list:
+        """Sorted distinct non-null values of a column."""
+        if column not in FIELDS:
+            raise ValueError(f"Unknown column '{column}'")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT {column} FROM {self.TABLE} "
+                f"WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()
+        return [value for (value,) in rows]
+
+    def _select(self, start: date | None, end: date | None) -> tuple[str, list]:
+        """SELECT statement and parameters for rows dated within [start, end]."""
+        where, params = self._where(start, end)
+        return f"SELECT * FROM {self.TABLE} {where} ORDER BY id", params
+
+    def _where(
+        self,
+        start: date | None,
+        end: date | None,
+        filters: dict | None = None,
+    ) -> tuple[str, list]:
+        """WHERE clause and parameters for a date range and exact-match filters."""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end.isoformat())
+        for column, value in (filters or {}).items():
+            if column not in FIELDS:
+                raise ValueError(f"Unknown column '{column}'")
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def write(self, df: pd.DataFrame) -> None:
+        # Repeated ids (possible in old CSVs) get fresh ones from SQLite
+        df = df.assign(id=df["id"].where(~df["id"].duplicated()))
+        rows = [self._row(record) for record in df.to_dict("records")]
+
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.TABLE}")
+            conn.executemany(self.UPSERT, rows)
+
+    def upsert_many(self, records: list[dict]) -> None:
+        """
+        Insert sessions, or add their duration to the same-day row, in one
+        transaction.
+
+        Args:
+            records (list[dict]): Session values, oldest first; "id" is
+                assigned if missing
+        """
+        with self._connect() as conn:
+            conn.executemany(self.UPSERT, [self._row(record) for record in records])
+
+    def delete(self, ids: list[int]) -> None:
+        """
+        Delete rows by id.
+
+        Args:
+            ids (list[int]): Ids of the rows to delete
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                f"DELETE FROM {self.TABLE} WHERE id = ?", [(int(i),) for i in ids]
+            )
+
+    @contextmanager
+    def _connect(self):
+        """
+        Open a connection, commit on success and always close it.
+        The schema is created once per database file and process.
+        """
+        path = self.path.resolve()
+        # A file removed since (e.g. a deleted workspace) needs the schema again
+        new_file = not path.exists()
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with _sqlite_schema_lock:
+                if new_file or path not in _sqlite_schema_ready:
+                    # WAL mode is stored in the database file
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(self.SCHEMA)
+                    _sqlite_schema_ready.add(path)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _row(self, record: dict) -> tuple:
+        """Convert a record to SQLite parameters in FIELDS order."""
+        values = []
+        for field in FIELDS:
+            value = record.get(field)
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                values.append(None)
+            elif field in ("start_time", "end_time"):
+                values.append(pd.Timestamp(value).isoformat(sep=" "))
+            elif field == "date":
+                values.append(value if isinstance(value, str) else pd.Timestamp(value).strftime("%Y-%m-%d"))
+            elif hasattr(value, "item"):
+                # NumPy scalars are not understood by sqlite3
+                values.append(value.item())
+            else:
+                values.append(value)
+        return tuple(values)
+
+
+class PartitionedBackend(StorageBackend):
+    """
+    One CSV file per month, laid out as time_logs/year=YYYY/month=MM.csv
+    from the `year` and `month` columns.
+
+    Range reads only open the months that overlap the range, and write()
+    can rewrite just the months a change touched.
+    """
+
+    name = "partitioned"
+    partitioned = True
+    partition_backend = CSVBackend
+
+    def __init__(self, data_dir: Path, stem: str = "time_logs"):
+        super().__init__(data_dir, stem)
+        self.manifest = self.path / "_manifest.json"
+
+    def exists(self) -> bool:
+        return self.manifest.exists()
+
+    def files(self) -> list[Path]:
+        # Every write rewrites the manifest
+        return [self.manifest]
+
+    def partitions(self) -> list[tuple[int, int]]:
+        """(year, month) of every stored partition, oldest first."""
+        suffix = self.partition_backend.suffix
+        keys = []
+        for part in self.path.glob(f"year=*/month=*{suffix}"):
+            year = int(part.parent.name.split("=")[1])
+            month = int(part.name[len("month="):-len(suffix)])
+            keys.append((year, month))
+        return sorted(keys)
+
+    def read(self, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        frames = [
+            self._partition(year, month).read()
+            for year, month in self.partitions()
+            if _month_overlaps(year, month, start, end)
+        ]
+
+        if not frames:
+            return pd.DataFrame(columns=FIELDS)
+
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        return filter_dates(df, start, end)
+
+    def iter_chunks(self, chunksize, start=None, end=None):
+        for year, month in self.partitions():
+            if _month_overlaps(year, month, start, end):
+                yield from self._partition(year, month).iter_chunks(chunksize, start, end)
+
+    def write(self, df: pd.DataFrame, months: list[tuple[int, int]] | None = None) -> None:
+        """
+        Replace partitions with the rows of `df`.
+
+        Args:
+            df (pd.DataFrame): Logs rows
+            months (list | None): Only rewrite these (year, month) partitions;
+                `df` must then hold all of their rows. Defaults to all.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        groups = {
+            (int(year), int(month)): rows
+            for (year, month), rows in df.groupby(["year", "month"])
+        }
+        targets = set(months) if months is not None else set(groups) | set(self.partitions())
+
+        for year, month in sorted(targets):
+            partition = self._partition(year, month)
+            rows = groups.get((year, month))
+            if rows is None:
+                partition.path.unlink(missing_ok=True)
+            else:
+                partition.path.parent.mkdir(exist_ok=True)
+                partition.write(rows)
+
+        manifest = {
+            "partitions": [f"{year:04d}-{month:02d}" for year, month in self.partitions()],
+            "written_at_ns": time.time_ns(),
+        }
+        with atomic_path(self.manifest) as tmp:
+            tmp.write_text(json.dumps(manifest))
+
+    def _partition(self, year: int, month: int) -> StorageBackend:
+        return self.partition_backend(self.path / f"year={year:04d}", stem=f"month={month:02d}")
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (CSVBackend, ParquetBackend, FeatherBackend, SQLiteBackend, PartitionedBackend)
+}
+
+
+def get_backend(name: str, data_dir: Path) -> StorageBackend:
+    """
+    Instantiate a backend by name.
+
+    Args:
+        name (str): One of BACKENDS
+        data_dir (Path): Directory holding the snapshot file
+
+    Returns:
+        StorageBackend: The backend instance
+    """
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown storage backend '{name}'. "
+            f"Choose one of: {', '.join(BACKENDS)}"
+        ) from None
+
+    return backend_cls(data_dir)
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `path`, then move it over `path`.
+
+    The file is flushed to disk before the rename, so readers see either
+    the old file or the complete new one. Nothing is replaced on error.
+
+    Args:
+        path (Path): File to replace
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        with open(tmp, "rb+") as handle:
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def parse_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse start_time/end_time read from CSV.
+
+    ISO8601 parsing accepts both "YYYY-MM-DD HH:MM:SS[.ffffff]" and the
+    bare "YYYY-MM-DD" pandas writes for midnight-only columns.
+    """
+    for column in ("start_time", "end_time"):
+        df[column] = pd.to_datetime(df[column], format="ISO8601")
+    return df
+
+
+def filter_dates(df: pd.DataFrame, start: date | None, end: date | None) -> pd.DataFrame:
+    """
+    Keep the rows whose `date` falls within [start, end].
+
+    Args:
+        df (pd.DataFrame): Logs rows
+        start (date | None): First date to include, or no lower bound
+        end (date | None): Last date to include, or no upper bound
+
+    Returns:
+        pd.DataFrame: The matching rows
+    """
+    if start is None and end is None:
+        return df
+
+    # Typed dates compare as datetime64; ISO date strings compare as text
+    if pd.api.types.is_datetime64_dtype(df["date"]):
+        dates, to_key = df["date"], pd.Timestamp
+    else:
+        dates, to_key = df["date"].astype(str), date.isoformat
+
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= dates >= to_key(start)
+    if end is not None:
+        mask &= dates <= to_key(end)
+
+    return df[mask].reset_index(drop=True)
+
+
+def _month_overlaps(year: int, month: int, start: date | None, end: date | None) -> bool:
+    """Whether any day of the month falls within [start, end]."""
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    return (start is None or last >= start) and (end is None or first <= end)
+
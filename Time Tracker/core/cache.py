@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ============================
+# Process-wide LRU cache
+# ============================
+#
+# Shared by every session in the Streamlit process. Entries are stored
+# with the logs_signature() they were built from and are only served
+# while it still matches. The least recently used entries are evicted
+# once the cache holds more than `max_bytes` or `max_entries`.
+
+
+class FrameCache:
+    """
+    Thread-safe LRU of DataFrames (and small derived values), bounded by
+    an estimate of their memory use.
+
+    Keys are tuples whose first item is the namespace (workspace
+    directory) they belong to, so one namespace can be dropped at a time.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[tuple, object, int]] = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: tuple, signature: tuple):
+        """
+        Return the value cached under `key` if it was built from `signature`.
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: tuple, signature: tuple, value) -> None:
+        """Cache `value`, evicting least recently used entries to make room."""
+        size = estimate_bytes(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (signature, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def discard(self, namespace=None) -> None:
+        """Drop every entry of a namespace, or everything if None."""
+        with self._lock:
+            for key in list(self._entries):
+                if namespace is None or key[0] == namespace:
+                    self._pop(key)
+
+    def stats(self) -> dict:
+        """
+        Return cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, entries and bytes
+        """
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _pop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+
+def estimate_bytes(value) -> int:
+    """
+    Approximate memory held by a cached value.
+
+    DataFrames count their Python string objects too (deep=True), which
+    is what dominates the CSV-loaded frames.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return 64 * len(value)
+    return 64
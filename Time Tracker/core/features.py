@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from utils.time_utils import (
+    DISPLAY_TIMEZONE,
+    PERIODS,
+    TIME_BLOCKS,
+    period_codes,
+    time_block_codes,
+)
+
+# ============================
+# Time-of-day features
+# ============================
+#
+# Derives every local-time feature the analytics need from start_time in
+# one vectorized pass: a single tz conversion, then integer arithmetic on
+# epoch seconds instead of repeated .dt accessors and Python date objects.
+#
+# There is no cache of these features next to the stored logs. The
+# Analytics tab reads core.rollups, which derive them once per session as
+# it is logged and keep only per-day aggregates; a full rebuild derives
+# them here in one pass. A per-row feature cache would duplicate the logs
+# and be invalidated by every log_activity.
+
+SECONDS_PER_DAY = 86_400
+
+# 1970-01-01 (day 0) was a Thursday; weekday 0 is Monday
+EPOCH_WEEKDAY = 3
+
+
+def derive_features(start_time: pd.Series, tz: str = DISPLAY_TIMEZONE) -> pd.DataFrame:
+    """
+    Compute local-time features for a column of start times.
+
+    Naive timestamps are treated as UTC, like the rest of the app.
+
+    Args:
+        start_time (pd.Series): Session start times
+        tz (str): IANA timezone to express local time in
+
+    Returns:
+        pd.DataFrame: Indexed like `start_time`, with columns
+            local_time (datetime64), day (int32 days since 1970-01-01),
+            weekday (int8, Monday=0), hour (int8), hour_float (float64),
+            time_block and period (categoricals)
+    """
+    utc = pd.DatetimeIndex(pd.to_datetime(start_time, utc=True))
+    local_time = utc.tz_convert(tz).tz_localize(None)
+
+    seconds = local_time.values.astype("datetime64[s]").astype(np.int64)
+    day = seconds // SECONDS_PER_DAY
+    second_of_day = seconds - day * SECONDS_PER_DAY
+    hour = (second_of_day // 3600).astype(np.int8)
+
+    return pd.DataFrame(
+        {
+            "local_time": local_time,
+            "day": day.astype(np.int32),
+            "weekday": ((day + EPOCH_WEEKDAY) % 7).astype(np.int8),
+            "hour": hour,
+            "hour_float": second_of_day / 3600,
+            "time_block": pd.Categorical.from_codes(time_block_codes(hour), TIME_BLOCKS),
+            "period": pd.Categorical.from_codes(period_codes(hour), PERIODS),
+        },
+        index=start_time.index,
+    )
+
+
+def day_to_date(day: np.ndarray) -> np.ndarray:
+    """
+    Convert day ordinals from derive_features to ISO date strings.
+
+    Args:
+        day (np.ndarray): Days since 1970-01-01
+
+    Returns:
+        np.ndarray: "YYYY-MM-DD" strings
+    """
+    return np.asarray(day).astype("datetime64[D]").astype(str)
+
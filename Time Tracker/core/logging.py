@@ -1,9 +1,42 @@
+import argparse
+import os
+import time
 from datetime import datetime
+from typing import Iterable
 import pandas as pd
-from core.storage import load_logs, save_logs
-from utils.time_utils import get_time_block, get_period
+from core.rollups import rebuild_rollups, record_sessions, rollups_in_sync
+from core.storage import (
+    COLUMNS,
+    MAX_RETRIES,
+    STORAGE_MODE,
+    StaleLogsError,
+    append_log,
+    append_logs,
+    ensure_data_file,
+    get_storage_backend,
+    load_logs,
+    logs_signature,
+    merge_sessions,
+    next_log_id,
+    reserve_log_ids,
+    save_logs,
+    transaction,
+)
+from core.workspaces import set_workspace
+from core.write_behind import WriteBehindQueue
+from utils.profiling import traced
+from utils.time_utils import get_period, get_periods, get_time_block, get_time_blocks
 
+# Columns a bulk import needs; "activity_name" is accepted for "activity"
+SESSION_COLUMNS = ["activity", "category", "mood", "start_time", "end_time"]
 
+# Queue sessions and write them in the background (see core.write_behind)
+WRITE_BEHIND = os.environ.get("TIME_TRACKER_WRITE_BEHIND", "0") == "1"
+
+_write_queue: WriteBehindQueue | None = None
+
+
+@traced(category="storage")
 def log_activity(
     activity_name: str,
     category: str,
@@ -15,6 +48,13 @@ def log_activity(
     Log an activity to the CSV.
     If the activity already exists on the same day, sum the duration.
 
+    In "journal" storage mode the session is appended to the journal and
+    merged into the same-day row when the logs are loaded or compacted.
+    The SQLite backend merges it with a single indexed UPSERT.
+
+    With WRITE_BEHIND the session is only queued and this returns at once;
+    reads still include it (see write_queue()).
+
     Args:
         activity_name (str): Name of the activity
         category (str): Activity category
@@ -27,40 +67,238 @@ def log_activity(
     duration_seconds = int((end_time - start_time).total_seconds())
     start_hour = start_time.hour
 
-    # Load existing logs
-    df = load_logs()
-
     # Extract date/month/year
     date = start_time.date()
     month = start_time.month
     year = start_time.year
 
+    record = {
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration_seconds": duration_seconds,
+        "activity": activity_name,
+        "category": category,
+        "mood": mood,
+        "start_hour": start_hour,
+        "time_block": get_time_block(start_hour),
+        "period": get_period(start_hour),
+        "date": date,
+        "month": month,
+        "year": year,
+    }
+
+    if WRITE_BEHIND:
+        write_queue().enqueue(record)
+        return
+
+    write_sessions([record])
+
+
+@traced(category="storage")
+def write_sessions(records: list[dict]) -> None:
+    """
+    Persist sessions and patch the rollups, as log_activity does.
+
+    Args:
+        records (list[dict]): Session records without "id", oldest first
+    """
+    # One lock around the check, the write and the rollup update, so no
+    # other writer's change lands in between (see core.rollups)
+    with transaction():
+        # Rollups can only be patched incrementally if they matched the logs
+        # before this write; otherwise the Analytics tab rebuilds them
+        update_rollups = rollups_in_sync()
+
+        if len(records) == 1:
+            _write_session(records[0])
+        elif STORAGE_MODE == "journal" or get_storage_backend().supports_upsert:
+            append_logs(records)
+        else:
+            batch = pd.DataFrame(records).assign(id=pd.NA)[COLUMNS]
+            batch["date"] = batch["date"].astype(str)
+            _save_batch(batch)
+
+        if update_rollups:
+            record_sessions(records)
+
+
+def write_queue() -> WriteBehindQueue:
+    """
+    The process-wide write-behind queue, created on first use.
+    Its stats() report pending sessions, batches and backpressure.
+    """
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteBehindQueue(write_sessions)
+    return _write_queue
+
+
+def _write_session(record: dict) -> None:
+    """
+    Persist one session, merging it into an existing same-day row.
+
+    Args:
+        record (dict): Session values keyed by COLUMNS, without "id"
+    """
+    if STORAGE_MODE == "journal" or get_storage_backend().supports_upsert:
+        append_log(record)
+        return
+
+    # Create the snapshot first, or creating it would change the signature
+    ensure_data_file()
+
+    # Optimistic read-modify-write: start over if another session saved first
+    for _ in range(MAX_RETRIES):
+        signature = logs_signature()
+        df = _merge_session(load_logs(include_pending=False), record)
+        try:
+            save_logs(df, expected_signature=signature)
+            return
+        except StaleLogsError:
+            continue
+
+    # Heavily contended: hold the lock for the whole load-modify-save
+    with transaction():
+        save_logs(_merge_session(load_logs(include_pending=False), record))
+
+
+def _merge_session(df: pd.DataFrame, record: dict) -> pd.DataFrame:
+    """Add a session to the same-day row of `df`, or append it as a new row."""
+    activity_name = record["activity"]
+    date = record["date"]
+
     # Check if the activity already exists (same activity name & date)
-    mask = (df["activity"] == activity_name) & (df["date"] == pd.to_datetime(date))
+    mask = (df["activity"] == activity_name) & (df["date"] == pd.Timestamp(date))
     if mask.any():
         # Add duration to existing row
         idx = df.index[mask][0]
-        df.at[idx, "duration_seconds"] += duration_seconds
+        df.at[idx, "duration_seconds"] += record["duration_seconds"]
         # Optional: you could update category/mood if you want
     else:
         # Create new row
-        new_row = {
-            "id": len(df) + 1,
-            "start_time": start_time,
-            "end_time": end_time,
-            "duration_seconds": duration_seconds,
-            "activity": activity_name,
-            "category": category,
-            "mood": mood,
-            "start_hour": start_hour,
-            "time_block": get_time_block(start_hour),
-            "period": get_period(start_hour),
-            "date": date,
-            "month": month,
-            "year": year,
-        }
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-
-    # Save updated logs
-    save_logs(df)
-    
\ No newline at end of file
+        new_row = {**record, "id": next_log_id()}
+        df = pd.concat([df, pd.DataFrame([new_row])[COLUMNS]], ignore_index=True)
+
+    return df
+
+
+# ============================
+# Bulk import / backfill
+# ============================
+
+@traced(category="storage")
+def import_sessions(sessions: str | pd.DataFrame | Iterable[dict]) -> dict:
+    """
+    Log many sessions at once, e.g. history exported from another tracker.
+
+    Sessions are merged with the same (activity, date) rule as
+    log_activity, against each other and the existing logs, in a single
+    pass, and the logs are written once.
+
+    Args:
+        sessions: A CSV path or buffer, a DataFrame, or an iterable of dicts
+            with SESSION_COLUMNS
+
+    Returns:
+        dict: "sessions" imported, "inserted" and "merged" row counts,
+            "skipped" invalid sessions, "seconds" taken and
+            "sessions_per_second"
+    """
+    started = time.perf_counter()
+
+    if isinstance(sessions, pd.DataFrame):
+        raw = sessions
+    elif isinstance(sessions, str) or hasattr(sessions, "read"):
+        raw = pd.read_csv(sessions)
+    else:
+        raw = pd.DataFrame(list(sessions))
+
+    raw = raw.rename(columns={"activity_name": "activity"})
+    missing = [c for c in SESSION_COLUMNS if c not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    start_time = pd.to_datetime(raw["start_time"], format="ISO8601")
+    end_time = pd.to_datetime(raw["end_time"], format="ISO8601")
+
+    valid = raw["activity"].notna() & start_time.notna() & (end_time >= start_time)
+    raw, start_time, end_time = raw[valid], start_time[valid], end_time[valid]
+
+    start_hour = start_time.dt.hour
+    batch = pd.DataFrame({
+        "id": pd.NA,
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration_seconds": (end_time - start_time).dt.total_seconds().astype("int64"),
+        "activity": raw["activity"].astype(str),
+        "category": raw["category"],
+        "mood": raw["mood"],
+        "start_hour": start_hour,
+        "time_block": get_time_blocks(start_hour).astype(str),
+        "period": get_periods(start_hour).astype(str),
+        "date": start_time.dt.strftime("%Y-%m-%d"),
+        "month": start_time.dt.month,
+        "year": start_time.dt.year,
+    })[COLUMNS].sort_values("start_time", kind="stable").reset_index(drop=True)
+
+    with transaction():
+        merged, inserted = _save_batch(batch)
+        rebuild_rollups(merged)
+
+    seconds = time.perf_counter() - started
+    return {
+        "sessions": len(batch),
+        "inserted": inserted,
+        "merged": len(batch) - inserted,
+        "skipped": int((~valid).sum()),
+        "seconds": seconds,
+        "sessions_per_second": len(batch) / seconds if seconds else float("inf"),
+    }
+
+
+def _save_batch(batch: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """
+    Merge sessions into the logs and write them once.
+
+    Args:
+        batch (pd.DataFrame): Sessions in COLUMNS layout with string dates,
+            oldest first; ids are assigned here
+
+    Returns:
+        tuple[pd.DataFrame, int]: The saved logs and the number of new rows
+    """
+    # Hold the write lock so no session logged meanwhile is overwritten
+    with transaction():
+        df = load_logs(include_pending=False)
+
+        # Ids only for sessions that will start a new row
+        keys = batch["activity"] + "|" + batch["date"]
+        existing_keys = set(df["activity"].astype(str) + "|" + df["date"].astype(str))
+        new_row = ~keys.duplicated() & ~keys.isin(existing_keys)
+        batch.loc[new_row, "id"] = list(reserve_log_ids(int(new_row.sum())))
+
+        merged = merge_sessions(df, batch)
+        save_logs(merged)
+
+    return merged, int(new_row.sum())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import time tracking sessions from a CSV.")
+    parser.add_argument("csv", help=f"CSV with columns: {', '.join(SESSION_COLUMNS)}")
+    parser.add_argument("--workspace", help="workspace to import into, defaults to the default one")
+    args = parser.parse_args()
+
+    set_workspace(args.workspace)
+
+    report = import_sessions(args.csv)
+    print(
+        f"Imported {report['sessions']} sessions "
+        f"({report['inserted']} new rows, {report['merged']} merged, "
+        f"{report['skipped']} skipped) in {report['seconds']:.2f}s "
+        f"({report['sessions_per_second']:,.0f} sessions/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
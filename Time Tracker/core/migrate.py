@@ -0,0 +1,74 @@
+"""
+One-shot migration of the logs snapshot between storage backends.
+
+Usage (from the Time Tracker directory):
+    python -m core.migrate parquet
+    python -m core.migrate csv --source parquet
+    python -m core.migrate sqlite --workspace alice
+"""
+import argparse
+from core.backends import BACKENDS
+from core.workspaces import set_workspace
+from core.storage import (
+    COLUMNS,
+    _read_journal,
+    _read_tombstones,
+    get_storage_backend,
+    journal_file,
+    merge_sessions,
+    tombstone_file,
+    transaction,
+)
+
+
+def migrate_logs(target: str, source: str | None = None) -> int:
+    """
+    Copy all logs, including journaled sessions, into another backend.
+
+    The journal and tombstones are folded into the source snapshot as well
+    and then removed, so neither backend replays them a second time.
+
+    Args:
+        target (str): Backend to write to
+        source (str | None): Backend to read from, defaults to STORAGE_BACKEND
+
+    Returns:
+        int: Number of rows migrated
+    """
+    source_backend = get_storage_backend(source)
+    target_backend = get_storage_backend(target)
+
+    if not source_backend.exists():
+        raise FileNotFoundError(f"No logs found at {source_backend.path}")
+
+    with transaction():
+        deleted = set(_read_tombstones()["id"])
+        df = source_backend.read()
+        journal = _read_journal()
+        df = merge_sessions(
+            df[~df["id"].isin(deleted)], journal[~journal["id"].isin(deleted)]
+        )[COLUMNS]
+        source_backend.write(df)
+        target_backend.write(df)
+        journal_file().unlink(missing_ok=True)
+        tombstone_file().unlink(missing_ok=True)
+
+    return len(df)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate time logs between storage backends.")
+    parser.add_argument("target", choices=list(BACKENDS), help="backend to migrate to")
+    parser.add_argument("--source", choices=list(BACKENDS), help="backend to migrate from")
+    parser.add_argument("--workspace", help="workspace to migrate, defaults to the default one")
+    args = parser.parse_args()
+
+    set_workspace(args.workspace)
+
+    rows = migrate_logs(args.target, args.source)
+    print(f"Migrated {rows} rows to {get_storage_backend(args.target).path}")
+    print(f"Set TIME_TRACKER_BACKEND={args.target} to start using it.")
+
+
+if __name__ == "__main__":
+    main()
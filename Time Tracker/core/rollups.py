@@ -0,0 +1,441 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from core import storage
+from core.features import day_to_date, derive_features
+from utils.profiling import traced
+from utils.time_utils import DISPLAY_TIMEZONE
+
+# ============================
+# Analytics rollup store
+# ============================
+#
+# Pre-aggregated tables keyed by local (DISPLAY_TIMEZONE) date, kept up to
+# date incrementally by log_activity and the logs-tab delete path. The
+# Analytics tab only reads the rows inside its selected date range.
+#
+# The store records the logs' file signature (and the timezone) after every
+# update. If the logs change behind its back (another backend, a migration,
+# a restored file) or the timezone changes, the signatures differ and
+# ensure_rollups() rebuilds from scratch.
+#
+# Incremental updates must run inside storage.transaction(), together with
+# the log write they mirror: checking rollups_in_sync() before the write
+# and recording the new signature after it under the same lock means the
+# signature only moves past this writer's own change.
+
+ROLLUP_FILE_NAME = "time_logs.rollups.db"
+
+# Rollup databases whose schema this process has created (see _connect)
+_schema_lock = threading.Lock()
+_schema_ready: set[Path] = set()
+
+# Resolution of the time-of-day scatter
+HOUR_BUCKET_MINUTES = 15
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollup_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS rollup_rows (
+        activity TEXT NOT NULL,
+        date TEXT NOT NULL,
+        local_date TEXT NOT NULL,
+        hour_bucket REAL NOT NULL,
+        mood TEXT NOT NULL,
+        PRIMARY KEY (activity, date)
+    );
+    CREATE TABLE IF NOT EXISTS rollup_daily (
+        local_date TEXT PRIMARY KEY,
+        weekday INTEGER NOT NULL,
+        seconds INTEGER NOT NULL,
+        sessions INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS rollup_category (
+        local_date TEXT NOT NULL,
+        category TEXT NOT NULL,
+        sessions INTEGER NOT NULL,
+        PRIMARY KEY (local_date, category)
+    );
+    CREATE TABLE IF NOT EXISTS rollup_mood (
+        local_date TEXT NOT NULL,
+        mood TEXT NOT NULL,
+        sessions INTEGER NOT NULL,
+        PRIMARY KEY (local_date, mood)
+    );
+    CREATE TABLE IF NOT EXISTS rollup_hourly (
+        local_date TEXT NOT NULL,
+        hour_bucket REAL NOT NULL,
+        activity TEXT NOT NULL,
+        mood TEXT NOT NULL,
+        seconds INTEGER NOT NULL,
+        PRIMARY KEY (local_date, hour_bucket, activity, mood)
+    );
+"""
+
+# Delta upserts; rows that drop to zero are pruned afterwards
+UPSERTS = {
+    "daily": """
+        INSERT INTO rollup_daily (local_date, weekday, seconds, sessions)
+        VALUES (:local_date, :weekday, :seconds, :sessions)
+        ON CONFLICT (local_date) DO UPDATE SET
+            seconds = seconds + excluded.seconds,
+            sessions = sessions + excluded.sessions
+    """,
+    "category": """
+        INSERT INTO rollup_category (local_date, category, sessions)
+        VALUES (:local_date, :category, :sessions)
+        ON CONFLICT (local_date, category) DO UPDATE SET
+            sessions = sessions + excluded.sessions
+    """,
+    "mood": """
+        INSERT INTO rollup_mood (local_date, mood, sessions)
+        VALUES (:local_date, :mood, :sessions)
+        ON CONFLICT (local_date, mood) DO UPDATE SET
+            sessions = sessions + excluded.sessions
+    """,
+    "hourly": """
+        INSERT INTO rollup_hourly (local_date, hour_bucket, activity, mood, seconds)
+        VALUES (:local_date, :hour_bucket, :activity, :mood, :seconds)
+        ON CONFLICT (local_date, hour_bucket, activity, mood) DO UPDATE SET
+            seconds = seconds + excluded.seconds
+    """,
+}
+
+PRUNE = [
+    "DELETE FROM rollup_daily WHERE sessions <= 0 AND seconds <= 0",
+    "DELETE FROM rollup_category WHERE sessions <= 0",
+    "DELETE FROM rollup_mood WHERE sessions <= 0",
+    "DELETE FROM rollup_hourly WHERE seconds <= 0",
+]
+
+
+# ============================
+# Connection & sync state
+# ============================
+
+@contextmanager
+def _connect(write: bool = False):
+    """
+    Open the rollup database, commit on success and always close it.
+    The schema is created once per database file and process.
+
+    Args:
+        write (bool): Take the database's write lock up front, so
+            read-then-upsert sequences cannot interleave with other writers
+    """
+    directory = storage.data_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = (directory / ROLLUP_FILE_NAME).resolve()
+    # A file removed since (e.g. a deleted workspace) needs the schema again
+    new_file = not path.exists()
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with _schema_lock:
+            if new_file or path not in _schema_ready:
+                # WAL mode is stored in the database file
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                _schema_ready.add(path)
+        with conn:
+            if write:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+    finally:
+        conn.close()
+
+
+def _signature(logs_signature: tuple | None = None) -> str:
+    """What the rollups were built from: the logs on disk and the timezone."""
+    if logs_signature is None:
+        logs_signature = storage.logs_signature()
+    return repr((DISPLAY_TIMEZONE, logs_signature))
+
+
+def _mark_synced(conn: sqlite3.Connection, logs_signature: tuple | None = None) -> None:
+    """
+    Record the logs the rollups now reflect.
+
+    Args:
+        conn (sqlite3.Connection): Open rollup database
+        logs_signature (tuple | None): storage.logs_signature() of those
+            logs; defaults to the logs on disk now, which is only right
+            inside the storage.transaction() that wrote them
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO rollup_meta (key, value) VALUES ('signature', ?)",
+        (_signature(logs_signature),),
+    )
+
+
+def rollups_in_sync() -> bool:
+    """
+    Whether the rollups match the logs currently on disk.
+    Check this before a write to know if an incremental update is valid.
+    """
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT value FROM rollup_meta WHERE key = 'signature'"
+        ).fetchone()
+    return row is not None and row[0] == _signature()
+
+
+def _carry_over_sync(before: tuple, after: tuple) -> None:
+    """
+    Keep the rollups in sync across a compaction, which rewrites the log
+    files without changing the logs (storage calls this under its lock).
+    """
+    with _connect(write=True) as conn:
+        conn.execute(
+            "UPDATE rollup_meta SET value = ? WHERE key = 'signature' AND value = ?",
+            (_signature(after), _signature(before)),
+        )
+
+
+storage.register_compaction_hook(_carry_over_sync)
+
+
+@traced(category="aggregate")
+def ensure_rollups() -> None:
+    """Rebuild the rollups from the logs if they are out of sync."""
+    storage.ensure_data_file()
+    if not rollups_in_sync():
+        rebuild_rollups()
+
+
+# ============================
+# Building & updating
+# ============================
+
+def _derive(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the rollup keys of each log row.
+
+    Args:
+        df (pd.DataFrame): Logs rows (or session records) with start_time
+
+    Returns:
+        pd.DataFrame: activity, date, local_date, weekday, hour_bucket,
+            category, mood and seconds per row
+    """
+    features = derive_features(df["start_time"], DISPLAY_TIMEZONE)
+    bucket = HOUR_BUCKET_MINUTES / 60
+
+    return pd.DataFrame({
+        "activity": df["activity"].astype(str).to_numpy(),
+        "date": df["date"].astype(str).to_numpy(),
+        "local_date": day_to_date(features["day"].to_numpy()),
+        "weekday": features["weekday"].to_numpy(),
+        "hour_bucket": np.floor(features["hour_float"].to_numpy() / bucket) * bucket,
+        "category": df["category"].astype(object).fillna("").astype(str).to_numpy(),
+        "mood": df["mood"].astype(object).fillna("").astype(str).to_numpy(),
+        "seconds": df["duration_seconds"].astype("int64").to_numpy(),
+    })
+
+
+def _apply(conn: sqlite3.Connection, rows: pd.DataFrame, sessions: int) -> None:
+    """
+    Add the contribution of derived rows to every rollup table.
+
+    Args:
+        conn (sqlite3.Connection): Open rollup database
+        rows (pd.DataFrame): Output of _derive, seconds already signed
+        sessions (int): Session count delta per row (1, 0 or -1)
+    """
+    if rows.empty:
+        return
+
+    rows = rows.assign(sessions=sessions)
+
+    daily = rows.groupby(["local_date", "weekday"], as_index=False)[["seconds", "sessions"]].sum()
+    category = rows.groupby(["local_date", "category"], as_index=False)["sessions"].sum()
+    mood = rows.groupby(["local_date", "mood"], as_index=False)["sessions"].sum()
+    hourly = (
+        rows.groupby(["local_date", "hour_bucket", "activity", "mood"], as_index=False)["seconds"]
+        .sum()
+    )
+
+    for table, frame in (("daily", daily), ("category", category), ("mood", mood), ("hourly", hourly)):
+        conn.executemany(UPSERTS[table], _records(frame))
+
+    for statement in PRUNE:
+        conn.execute(statement)
+
+
+def _records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame rows as plain-Python dicts for sqlite3."""
+    return [
+        {key: value.item() if hasattr(value, "item") else value for key, value in row.items()}
+        for row in df.to_dict("records")
+    ]
+
+
+@traced(category="aggregate")
+def rebuild_rollups(df: pd.DataFrame | None = None) -> None:
+    """
+    Recompute every rollup table from the full logs.
+
+    Args:
+        df (pd.DataFrame | None): Logs to aggregate; by default the stored
+            logs are streamed with iter_logs() in bounded memory
+    """
+    # Taken before reading: if the logs change meanwhile, the rollups stay
+    # out of sync and the next ensure_rollups() rebuilds again
+    storage.ensure_data_file()
+    signature = storage.logs_signature()
+    chunks = [df] if df is not None else storage.iter_logs()
+
+    with _connect(write=True) as conn:
+        for table in ("rows", "daily", "category", "mood", "hourly"):
+            conn.execute(f"DELETE FROM rollup_{table}")
+
+        for chunk in chunks:
+            rows = _derive(chunk)
+            # The first row of an (activity, date) is the one merges go to
+            conn.executemany(
+                "INSERT OR IGNORE INTO rollup_rows VALUES "
+                "(:activity, :date, :local_date, :hour_bucket, :mood)",
+                _records(rows[["activity", "date", "local_date", "hour_bucket", "mood"]]),
+            )
+            _apply(conn, rows, sessions=1)
+
+        _mark_synced(conn, signature)
+
+
+@traced(category="aggregate")
+def record_sessions(records: list[dict]) -> None:
+    """
+    Add logged sessions to the rollups, in one transaction.
+
+    A session merged into an existing same-day row only adds its duration,
+    at that row's local date and time bucket, like the merge in the logs.
+    Call inside the storage.transaction() that wrote the sessions.
+
+    Args:
+        records (list[dict]): Sessions as passed to storage (see
+            log_activity), oldest first
+    """
+    if not records:
+        return
+    derived = _derive(pd.DataFrame(records))
+
+    with _connect(write=True) as conn:
+        for position in range(len(derived)):
+            rows = derived.iloc[[position]]
+            session = rows.iloc[0]
+            inserted = conn.execute(
+                "INSERT INTO rollup_rows VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (activity, date) DO NOTHING",
+                (
+                    session["activity"], session["date"], session["local_date"],
+                    float(session["hour_bucket"]), session["mood"],
+                ),
+            ).rowcount
+
+            if inserted:
+                _apply(conn, rows, sessions=1)
+                continue
+
+            local_date, hour_bucket, mood = conn.execute(
+                "SELECT local_date, hour_bucket, mood FROM rollup_rows "
+                "WHERE activity = ? AND date = ?",
+                (session["activity"], session["date"]),
+            ).fetchone()
+            rows = rows.assign(
+                local_date=local_date,
+                weekday=date.fromisoformat(local_date).weekday(),
+                hour_bucket=hour_bucket,
+                mood=mood,
+            )
+            _apply(conn, rows, sessions=0)
+
+        _mark_synced(conn)
+
+
+@traced(category="aggregate")
+def remove_logs(df: pd.DataFrame) -> None:
+    """
+    Subtract deleted log rows from the rollups.
+    Call inside the storage.transaction() that deleted them.
+
+    Args:
+        df (pd.DataFrame): The deleted rows, as they were in the logs
+    """
+    rows = _derive(df)
+    rows["seconds"] = -rows["seconds"]
+
+    with _connect(write=True) as conn:
+        conn.executemany(
+            "DELETE FROM rollup_rows WHERE activity = :activity AND date = :date",
+            _records(rows[["activity", "date"]]),
+        )
+        _apply(conn, rows, sessions=-1)
+        _mark_synced(conn)
+
+
+# ============================
+# Reading
+# ============================
+
+@traced(category="aggregate")
+def rollup_date_range() -> tuple[date, date] | None:
+    """
+    First and last local date with logged time.
+
+    Returns:
+        tuple[date, date] | None: Bounds, or None if nothing is logged
+    """
+    with _connect() as conn:
+        first, last = conn.execute(
+            "SELECT MIN(local_date), MAX(local_date) FROM rollup_daily"
+        ).fetchone()
+
+    if first is None:
+        return None
+    return date.fromisoformat(first), date.fromisoformat(last)
+
+
+@traced(category="aggregate")
+def load_rollups(start_date: date, end_date: date) -> dict[str, pd.DataFrame]:
+    """
+    Read the rollups for a local date range (inclusive).
+
+    Args:
+        start_date (date): First local date
+        end_date (date): Last local date
+
+    Returns:
+        dict[str, pd.DataFrame]: "daily" (local_date, seconds, sessions),
+            "weekday" (weekday, seconds), "category" and "mood" (label,
+            sessions) and "hourly" (hour_bucket, activity, mood, seconds)
+    """
+    params = (start_date.isoformat(), end_date.isoformat())
+    in_range = "WHERE local_date BETWEEN ? AND ?"
+
+    queries = {
+        "daily": f"SELECT local_date, seconds, sessions FROM rollup_daily {in_range} ORDER BY local_date",
+        "weekday": f"SELECT weekday, SUM(seconds) AS seconds FROM rollup_daily {in_range} GROUP BY weekday",
+        "category": (
+            f"SELECT category, SUM(sessions) AS sessions FROM rollup_category {in_range} "
+            "AND category != '' GROUP BY category"
+        ),
+        "mood": (
+            f"SELECT mood, SUM(sessions) AS sessions FROM rollup_mood {in_range} "
+            "AND mood != '' GROUP BY mood"
+        ),
+        "hourly": (
+            f"SELECT hour_bucket, activity, mood, SUM(seconds) AS seconds FROM rollup_hourly {in_range} "
+            "AND mood != '' GROUP BY hour_bucket, activity, mood"
+        ),
+    }
+
+    with _connect() as conn:
+        return {
+            name: pd.read_sql_query(query, conn, params=params)
+            for name, query in queries.items()
+        }
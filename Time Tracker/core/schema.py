@@ -0,0 +1,167 @@
+"""
+Canonical in-memory dtypes of the time logs.
+
+Usage (from the Time Tracker directory):
+    python -m core.schema                     # memory report of the stored logs
+    python -m core.schema --workspace alice
+"""
+import argparse
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_datetime64_dtype
+from utils.time_utils import PERIODS, TIME_BLOCKS
+
+# ============================
+# Schema
+# ============================
+#
+# Labels are categoricals, hour/month/year small ints and start_time,
+# end_time and date datetime64, instead of the object strings and int64
+# a CSV read produces. load_logs, iter_logs and query_logs return frames
+# in this schema and save_logs enforces it before writing.
+#
+# Category order is stable: the known values come first, in the order
+# below, and values outside them (new activities, older or imported
+# labels) follow alphabetically, so nothing read from disk is lost.
+# Group on these columns with observed=True, or every known category
+# shows up in the result.
+
+# Values offered by the timer tab, in its order (see ui.timer_tab)
+CATEGORIES = ["Work", "Study", "Exercise", "Leisure", "Chores", "Other"]
+MOODS = ["Focused", "Relaxed", "Stressed", "Happy", "Tired", "Other"]
+
+# Known categories of each categorical column (activities are free text)
+CATEGORY_SETS = {
+    "activity": [],
+    "category": CATEGORIES,
+    "mood": MOODS,
+    "time_block": TIME_BLOCKS,
+    "period": PERIODS,
+}
+
+INT_COLUMNS = {
+    "id": "int64",
+    "duration_seconds": "int64",
+    "start_hour": "int8",
+    "month": "int8",
+    "year": "int16",
+}
+
+# `date` is the calendar date of start_time, at midnight
+DATETIME_COLUMNS = ["start_time", "end_time", "date"]
+
+
+def to_categorical(column: str, values: pd.Series) -> pd.Series:
+    """
+    Cast a column to a categorical with its known categories first, then
+    any other values found in it, sorted.
+
+    Args:
+        column (str): A key of CATEGORY_SETS
+        values (pd.Series): The column's values
+
+    Returns:
+        pd.Series: Unordered categorical holding every value of `values`
+    """
+    known = CATEGORY_SETS[column]
+    # One factorize pass; its categories come back sorted
+    observed = pd.Categorical(values)
+    extras = observed.categories.difference(known, sort=False)
+    return pd.Series(
+        observed.set_categories(known + list(extras)), index=values.index, name=values.name
+    )
+
+
+def enforce_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the logs columns of `df` to their canonical dtypes.
+
+    Columns already in their dtype are left alone and other columns are
+    passed through, so this is cheap on frames that are already typed.
+
+    Args:
+        df (pd.DataFrame): Logs in any dtypes (e.g. freshly read from CSV)
+
+    Returns:
+        pd.DataFrame: A shallow copy with typed columns
+
+    Raises:
+        ValueError: If a date or number cannot be parsed
+    """
+    df = df.copy(deep=False)
+
+    for column in CATEGORY_SETS.keys() & set(df.columns):
+        values = df[column]
+        known = CATEGORY_SETS[column]
+        if (
+            isinstance(values.dtype, CategoricalDtype)
+            and list(values.cat.categories[:len(known)]) == known
+        ):
+            continue
+        df[column] = to_categorical(column, values)
+
+    for column in INT_COLUMNS.keys() & set(df.columns):
+        if df[column].dtype != INT_COLUMNS[column]:
+            # Unassigned ids stay missing rather than failing the cast
+            dtype = INT_COLUMNS[column]
+            if column == "id" and df[column].isna().any():
+                dtype = "Int64"
+            df[column] = df[column].astype(dtype)
+
+    for column in set(DATETIME_COLUMNS) & set(df.columns):
+        if not is_datetime64_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], format="ISO8601")
+
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Memory use of each column before and after enforcing the schema.
+
+    Args:
+        before (pd.DataFrame): Logs as read
+        after (pd.DataFrame | None): The typed logs, defaults to
+            enforce_schema(before)
+
+    Returns:
+        pd.DataFrame: "before" and "after" bytes per column plus a "total"
+            and a "per_row" row, and the "saved_pct"
+    """
+    if after is None:
+        after = enforce_schema(before)
+
+    report = pd.DataFrame({
+        "before": before.memory_usage(deep=True, index=False),
+        "after": after.memory_usage(deep=True, index=False),
+    })
+    report.loc["total"] = report.sum()
+    rows = max(len(before), 1)
+    report.loc["per_row"] = report.loc["total"] / rows
+    report["saved_pct"] = (1 - report["after"] / report["before"].where(report["before"] > 0)) * 100
+    return report
+
+
+def main() -> None:
+    # Imported here: core.storage itself imports this module
+    from core.storage import get_storage_backend
+    from core.workspaces import set_workspace
+
+    parser = argparse.ArgumentParser(description="Report the memory the logs schema saves.")
+    parser.add_argument("--workspace", help="workspace to report on, defaults to the default one")
+    args = parser.parse_args()
+
+    set_workspace(args.workspace)
+
+    backend = get_storage_backend()
+    if not backend.exists():
+        print(f"No logs at {backend.path}")
+        return
+
+    raw = backend.read()
+    report = memory_report(raw)
+    print(f"{len(raw)} rows from {backend.path}")
+    print(report.to_string(float_format=lambda value: f"{value:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,61 @@
+import calendar
+import contextvars
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
 from pathlib import Path
+from typing import Iterator
+import numpy as np
 import pandas as pd
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from core.backends import (
+    StorageBackend,
+    atomic_path,
+    filter_dates,
+    get_backend,
+    parse_timestamps,
+)
+from core.cache import FrameCache
+from core.schema import enforce_schema
+from core.workspaces import workspace_dir
+from utils.profiling import traced
+
 # ============================
 # File & schema configuration
 # ============================
 
-DATA_DIR = Path("data")
-DATA_FILE = DATA_DIR / "time_logs.csv"
+# Every file below lives in the current workspace's directory, see
+# data_dir() and core.workspaces
+
+# Snapshot format: "csv" (default), "parquet", "feather", "sqlite" or
+# "partitioned" (one CSV per month)
+STORAGE_BACKEND = os.environ.get("TIME_TRACKER_BACKEND", "csv")
+
+# Append-only journal of sessions logged since the last compaction
+JOURNAL_NAME = "time_logs.journal.csv"
+
+# Ids of deleted rows, with their date, until the next compaction
+TOMBSTONE_NAME = "time_logs.tombstones.csv"
+TOMBSTONE_COLUMNS = ["id", "date"]
+
+# Last id handed out, so journaled sessions get their id when appended
+SEQUENCE_NAME = "time_logs.seq"
+
+# "journal" appends new sessions to the journal, "rewrite" rewrites the snapshot
+STORAGE_MODE = os.environ.get("TIME_TRACKER_STORAGE_MODE", "journal")
+
+# Compact in the background once the journal and tombstones grow past
+# this many bytes
+COMPACT_THRESHOLD_BYTES = int(
+    os.environ.get("TIME_TRACKER_COMPACT_THRESHOLD_BYTES", 256 * 1024)
+)
 
 COLUMNS = [
     "id",
@@ -27,46 +76,899 @@ COLUMNS = [
     "year",
 ]
 
+# Journal records carry the id their row gets if it is not a same-day merge
+JOURNAL_COLUMNS = COLUMNS
+
+# Advisory lock serializing writers across processes (see transaction())
+LOCK_NAME = "time_logs.lock"
+
+# Write in progress on behalf of another file, see record_intent()
+INTENT_NAME = "time_logs.intent.json"
+
+# How often a read or an optimistic write retries after a concurrent change
+MAX_RETRIES = 5
+
+# Per-workspace write locks: a reentrant lock, its depth and the open lock
+# file, keyed by data directory
+_locks_guard = threading.Lock()
+_locks: dict[Path, dict] = {}
+_compaction_threads: dict[Path, threading.Thread] = {}
+
+# Copy-on-write lets load_logs hand out shallow copies of the cached frame
+# without callers' edits leaking back into it (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Default number of rows per chunk for iter_logs
+CHUNK_SIZE = 50_000
+
+# Process-wide LRU of loaded logs and values derived from them (newest-first
+# order, filter options, CSV export), shared by all sessions.
+# Keys start with the workspace directory; the least recently used entries
+# are evicted once the estimated size passes CACHE_MAX_MB.
+CACHE_MAX_MB = int(os.environ.get("TIME_TRACKER_CACHE_MAX_MB", 512))
+CACHE_MAX_ENTRIES = 64
+
+frame_cache = FrameCache(CACHE_MAX_MB * 1024 * 1024, CACHE_MAX_ENTRIES)
+
+# Columns query_logs filters on by exact match
+FILTER_COLUMNS = ("activity", "category", "mood")
+
+# Callables returning sessions accepted but not yet written for a data
+# directory (see core.write_behind); reads merge them in so users see
+# their own writes right away
+_pending_providers: list = []
+
+# Callables told about each compaction (see register_compaction_hook)
+_compaction_hooks: list = []
+
+
+class StaleLogsError(RuntimeError):
+    """The logs changed on disk since the caller loaded them."""
+
+
+# ============================
+# Paths
+# ============================
+
+def data_dir() -> Path:
+    """Absolute data directory of the current workspace."""
+    return workspace_dir()
+
+
+def journal_file() -> Path:
+    return data_dir() / JOURNAL_NAME
+
+
+def tombstone_file() -> Path:
+    return data_dir() / TOMBSTONE_NAME
+
+
+def sequence_file() -> Path:
+    return data_dir() / SEQUENCE_NAME
+
+
+def lock_file() -> Path:
+    return data_dir() / LOCK_NAME
+
+
+def intent_file() -> Path:
+    return data_dir() / INTENT_NAME
+
+
 # ============================
 # Core storage functions
 # ============================
 
+def get_storage_backend(name: str | None = None) -> StorageBackend:
+    """
+    Return the backend that stores the logs snapshot.
+
+    Args:
+        name (str | None): Backend name, defaults to STORAGE_BACKEND
+
+    Returns:
+        StorageBackend: Backend rooted at the current workspace's data_dir()
+    """
+    return get_backend(name or STORAGE_BACKEND, data_dir())
+
+
 def ensure_data_file() -> None:
     """
-    Ensure that the data directory and CSV file exist.
-    If the CSV does not exist, create it with the correct columns.
+    Ensure that the data directory and snapshot file exist.
+    If the snapshot does not exist, create it with the correct columns.
     """
-    DATA_DIR.mkdir(exist_ok=True)
+    data_dir().mkdir(parents=True, exist_ok=True)
 
-    if not DATA_FILE.exists():
-        empty_df = pd.DataFrame(columns=COLUMNS)
-        empty_df.to_csv(DATA_FILE, index=False)
+    backend = get_storage_backend()
+    if backend.exists():
+        return
 
+    with transaction():
+        if not backend.exists():
+            empty_df = pd.DataFrame(columns=COLUMNS)
+            backend.write(empty_df)
 
-def load_logs() -> pd.DataFrame:
+
+@traced(category="storage")
+def load_logs(
+    start: date | None = None,
+    end: date | None = None,
+    include_pending: bool = True,
+) -> pd.DataFrame:
     """
-    Load time logs from the CSV.
+    Load time logs from the snapshot, replaying any journaled sessions.
+
+    With a date range only rows whose `date` falls within it are returned;
+    the partitioned and SQLite backends then skip reading everything else.
+
+    Results are kept in the process-wide frame_cache and reused until the
+    snapshot or the journal changes on disk. Each caller gets its own copy-on-write view,
+    so modifying it never touches the cache.
+
+    Reads take no lock. If another process writes while the files are being
+    read, the read is retried, and after MAX_RETRIES it waits for the lock.
+
+    Sessions still queued for writing (see register_pending) are merged in
+    unless `include_pending` is False, which writers must use.
+
+    Columns have the dtypes of core.schema (categorical labels, small ints,
+    datetime64 dates).
+
+    Args:
+        start (date | None): First date to include
+        end (date | None): Last date to include
+        include_pending (bool): Merge in queued sessions
 
     Returns:
-        pd.DataFrame: All logged timer records
+        pd.DataFrame: Logged timer records
     """
+    df = _load_stored(start, end)
+    if include_pending:
+        pending = pending_logs(start, end)
+        if not pending.empty:
+            return enforce_schema(merge_sessions(df, pending))
+    return df
+
+
+def _load_stored(start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """load_logs without queued sessions."""
     ensure_data_file()
 
-    df = pd.read_csv(
-        DATA_FILE,
-        parse_dates=["start_time", "end_time"]
-    )
+    key = (data_dir(), "logs", start, end)
+    signature = logs_signature()
+    cached = frame_cache.get(key, signature)
+    if cached is not None:
+        return cached.copy(deep=False)
 
-    return df
+    for _ in range(MAX_RETRIES):
+        try:
+            df = _read_logs(start, end)
+        except FileNotFoundError:
+            # A compaction replaced or removed a file mid-read
+            signature = logs_signature()
+            continue
+        current = logs_signature()
+        if current == signature:
+            break
+        signature = current
+    else:
+        with transaction():
+            signature = logs_signature()
+            df = _read_logs(start, end)
+
+    frame_cache.put(key, signature, df)
+    return df.copy(deep=False)
+
+
+def register_pending(provider) -> None:
+    """
+    Register a source of queued, not yet written sessions.
+
+    Args:
+        provider: Called with a data directory, returns its queued sessions
+            in COLUMNS layout
+    """
+    _pending_providers.append(provider)
 
 
-def save_logs(df: pd.DataFrame) -> None:
+def register_compaction_hook(hook) -> None:
     """
-    Save logs to CSV.
+    Register a callback for compactions, which change the files (and so
+    logs_signature()) but not the logs they hold.
+
+    Args:
+        hook: Called inside the write lock with the signatures from
+            before and after the compaction
+    """
+    _compaction_hooks.append(hook)
+
+
+def pending_logs(start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """
+    Sessions of the current workspace that are queued but not yet written.
+
+    Returns:
+        pd.DataFrame: Records in COLUMNS layout, oldest first
+    """
+    frames = [provider(data_dir()) for provider in _pending_providers]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+
+    pending = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return filter_dates(pending, start, end)
+
+
+def _read_logs(start: date | None, end: date | None) -> pd.DataFrame:
+    """Read the snapshot and journal into one frame, bypassing the cache."""
+    frames = list(iter_logs(None, start, end))
+    if len(frames) == 1:
+        return frames[0]
+    # Chunks with different categories concatenate to object columns
+    return enforce_schema(pd.concat(frames, ignore_index=True))
+
+
+def iter_logs(
+    chunksize: int | None = CHUNK_SIZE,
+    start: date | None = None,
+    end: date | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream time logs in chunks, replaying any journaled sessions and
+    dropping deleted rows.
+
+    Memory stays bounded by `chunksize` (plus the journal, which compaction
+    keeps small). Chunks are in the core.schema dtypes. Journaled sessions for a new (activity, date) come
+    last, in a chunk of their own.
+
+    Args:
+        chunksize (int | None): Rows per chunk, or None for a single chunk
+        start (date | None): First date to include
+        end (date | None): Last date to include
+
+    Yields:
+        pd.DataFrame: Chunks of logged timer records
+    """
+    ensure_data_file()
+
+    backend = get_storage_backend()
+    deleted = set(_read_tombstones()["id"])
+    pending = filter_dates(_read_journal(), start, end)
+    if deleted:
+        pending = pending[~pending["id"].isin(deleted)]
+
+    if chunksize is None:
+        chunks = iter([backend.read(start, end)])
+    else:
+        chunks = backend.iter_chunks(chunksize, start, end)
+
+    for chunk in chunks:
+        if deleted:
+            chunk = chunk[~chunk["id"].isin(deleted)]
+        if not pending.empty:
+            in_chunk = _same_day_rows(pending, chunk[_same_day_rows(chunk, pending)])
+            if in_chunk.any():
+                chunk = merge_sessions(chunk, pending[in_chunk])
+                pending = pending[~in_chunk]
+        yield enforce_schema(chunk)
+
+    if not pending.empty:
+        yield enforce_schema(merge_sessions(pd.DataFrame(columns=COLUMNS), pending))
+
+
+@traced(category="storage")
+def save_logs(df: pd.DataFrame, expected_signature: tuple | None = None) -> None:
+    """
+    Save logs to the snapshot.
+    The journal and tombstones are cleared, since `df` already reflects them.
+
+    Pass the logs_signature() taken when `df` was loaded to save only if
+    nobody else wrote in between (optimistic concurrency); otherwise call
+    this inside transaction() together with the load.
 
     Args:
         df (pd.DataFrame): The full logs DataFrame to persist
+        expected_signature (tuple | None): Signature the save is based on
+
+    Raises:
+        StaleLogsError: If the logs no longer match `expected_signature`
+    """
+    ensure_data_file()
+    with transaction():
+        if expected_signature is not None and logs_signature() != expected_signature:
+            raise StaleLogsError("The logs changed since they were loaded")
+
+        get_storage_backend().write(enforce_schema(df[COLUMNS]))
+        _advance_sequence(df)
+        journal_file().unlink(missing_ok=True)
+        tombstone_file().unlink(missing_ok=True)
+    invalidate_cache()
+
+
+@contextmanager
+def transaction():
+    """
+    Hold the current workspace's write lock, across threads and processes.
+
+    Writers (appends, deletes, compaction, id reservation and full saves)
+    take it, so a load-modify-save inside one transaction cannot lose
+    another session's update. Nested transactions reuse the outer lock.
+    """
+    directory = data_dir()
+    with _locks_guard:
+        state = _locks.setdefault(
+            directory, {"lock": threading.RLock(), "depth": 0, "handle": None}
+        )
+
+    with state["lock"]:
+        if state["depth"] == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+            state["handle"] = open(directory / LOCK_NAME, "a+b")
+            _lock_file(state["handle"])
+        state["depth"] += 1
+        try:
+            # Left behind by a writer that died holding the lock
+            if state["depth"] == 1 and (directory / INTENT_NAME).exists():
+                resolve_intent()
+            yield
+        finally:
+            state["depth"] -= 1
+            if state["depth"] == 0:
+                _unlock_file(state["handle"])
+                state["handle"].close()
+                state["handle"] = None
+
+
+def record_intent(commit_file: Path, commit_text: str) -> None:
+    """
+    Record a write about to be made on behalf of another file, inside
+    transaction().
+
+    Lets that file (e.g. a write-behind outbox) learn whether the write
+    landed if the process dies before it is updated: the next transaction
+    finds the intent and, if the logs changed since it was recorded,
+    writes `commit_text` to `commit_file`. Writers call clear_intent()
+    once `commit_file` is up to date.
+
+    Args:
+        commit_file (Path): File to update once the write has landed
+        commit_text (str): Its content from then on
+    """
+    # The snapshot may be created on the first write, which must not count
+    ensure_data_file()
+    with atomic_path(intent_file()) as tmp:
+        tmp.write_text(json.dumps({
+            "signature": repr(logs_signature()),
+            "commit_file": str(commit_file),
+            "commit_text": commit_text,
+        }))
+
+
+def resolve_intent() -> bool:
+    """
+    Settle the recorded intent, inside transaction(): write its commit
+    file if the write landed, then clear it.
+
+    Returns:
+        bool: Whether the logs changed since the intent was recorded
+    """
+    try:
+        intent = json.loads(intent_file().read_text())
+    except (FileNotFoundError, ValueError):
+        clear_intent()
+        return False
+
+    landed = repr(logs_signature()) != intent["signature"]
+    if landed:
+        with atomic_path(Path(intent["commit_file"])) as tmp:
+            tmp.write_text(intent["commit_text"])
+    clear_intent()
+    return landed
+
+
+def clear_intent() -> None:
+    intent_file().unlink(missing_ok=True)
+
+
+def _lock_file(handle, blocking: bool = True) -> bool:
+    """
+    Take an exclusive lock on `handle` for this process.
+
+    Args:
+        handle: Open file
+        blocking (bool): Wait for the lock, or give up at once if it is held
+
+    Returns:
+        bool: Whether the lock was taken
+    """
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(handle.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    handle.seek(0)
+    while True:
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            # LK_LOCK gives up after ~10s; keep waiting like flock does
+
+
+def _unlock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ============================
+# Load cache
+# ============================
+
+def invalidate_cache() -> None:
+    """Drop the current workspace's cached logs so the next load reads from disk."""
+    frame_cache.discard(data_dir())
+
+
+def cache_stats() -> dict:
+    """
+    Return frame_cache counters, for all workspaces.
+
+    Returns:
+        dict: "hits", "misses" and "evictions" since the process started,
+            plus the current "entries" and estimated "bytes"
+    """
+    return frame_cache.stats()
+
+
+def _file_signature(path: Path) -> tuple | None:
+    """Identity and version of a file: path, inode, mtime and size."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (str(path.resolve()), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def logs_signature() -> tuple:
+    """Signature of every file load_logs reads."""
+    files = get_storage_backend().files() + [journal_file(), tombstone_file()]
+    return tuple(_file_signature(path) for path in files)
+
+
+# ============================
+# Paged queries
+# ============================
+
+@traced(category="storage")
+def query_logs(
+    filters: dict | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Return one page of logs, newest first.
+
+    Backends that support queries (SQLite) filter, sort and paginate in SQL.
+    Otherwise the date range is pushed down to load_logs, and the page is
+    gathered through a cached newest-first index, so nothing is sorted or
+    copied per call beyond the filter masks and the page itself.
+
+    Args:
+        filters (dict | None): Exact-match values for FILTER_COLUMNS;
+            None values are ignored
+        start (date | None): First date to include
+        end (date | None): Last date to include
+        offset (int): Rows to skip
+        limit (int): Page size
+
+    Returns:
+        tuple[pd.DataFrame, int]: The page and the total number of matches
+    """
+    filters = {column: value for column, value in (filters or {}).items() if value is not None}
+    unknown = set(filters) - set(FILTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Cannot filter logs on {sorted(unknown)}")
+
+    ensure_data_file()
+    backend = get_storage_backend()
+    pending = pending_logs(start, end)
+    if backend.supports_query and not _has_pending_changes() and pending.empty:
+        page, total = backend.query(filters, start, end, offset, limit)
+        return enforce_schema(page), total
+
+    df = _load_stored(start, end)
+    if pending.empty:
+        order = _derive(("order", start, end), lambda: _newest_first(df))
+    else:
+        df = enforce_schema(merge_sessions(df, pending))
+        order = _newest_first(df)
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for column, value in filters.items():
+            mask &= (df[column] == value).to_numpy()
+        order = order[mask[order]]
+
+    page = df.iloc[order[offset:offset + limit]].reset_index(drop=True)
+    return page, len(order)
+
+
+@traced(category="storage")
+def log_filter_options() -> dict[str, list]:
+    """
+    Distinct values of each filterable column, for the Logs tab filters.
+
+    Returns:
+        dict[str, list]: Sorted values keyed by column in FILTER_COLUMNS
+    """
+    ensure_data_file()
+    backend = get_storage_backend()
+    if backend.supports_query and not _has_pending_changes():
+        options = {column: backend.distinct(column) for column in FILTER_COLUMNS}
+    else:
+        def build() -> dict[str, list]:
+            df = _load_stored()
+            return {
+                column: sorted(df[column].dropna().unique().tolist())
+                for column in FILTER_COLUMNS
+            }
+
+        options = _derive(("options",), build)
+
+    pending = pending_logs()
+    if pending.empty:
+        return options
+    return {
+        column: sorted(set(values) | set(pending[column].dropna()))
+        for column, values in options.items()
+    }
+
+
+@traced(category="storage")
+def export_logs_csv() -> str:
+    """
+    All logs as CSV text, rebuilt only when the logs change.
+
+    Returns:
+        str: CSV with COLUMNS as the header
+    """
+    return _derive(("csv",), lambda: _load_stored()[COLUMNS].to_csv(index=False))
+
+
+def _newest_first(df: pd.DataFrame) -> np.ndarray:
+    """Row positions of `df` ordered by start_time, newest first."""
+    start_time = df["start_time"].to_numpy()
+    return np.argsort(start_time, kind="stable")[::-1]
+
+
+def _derive(key: tuple, build):
+    """Cache `build()` under `key` until the logs change on disk."""
+    key = (data_dir(),) + key
+    signature = logs_signature()
+    value = frame_cache.get(key, signature)
+    if value is None:
+        value = build()
+        frame_cache.put(key, signature, value)
+    return value
+
+
+# ============================
+# Append-only journal
+# ============================
+
+def append_log(record: dict) -> None:
+    """
+    Append one session to the journal without touching the snapshot.
+
+    If a row for the same activity and date already exists, the record is
+    treated as a delta and its duration is added to that row on load.
+    Backends that support upserts (SQLite) apply the record directly.
+
+    Args:
+        record (dict): Session values keyed by COLUMNS; the id is assigned here
+    """
+    append_logs([record])
+
+
+@traced(category="storage")
+def append_logs(records: list[dict]) -> None:
+    """
+    Append sessions to the journal in one write (see append_log).
+
+    Args:
+        records (list[dict]): Session values keyed by COLUMNS, oldest first
     """
+    if not records:
+        return
+
     ensure_data_file()
-    df.to_csv(DATA_FILE, index=False)
 
+    backend = get_storage_backend()
+    if backend.supports_upsert:
+        backend.upsert_many(records)
+        invalidate_cache()
+        return
+
+    with transaction():
+        ids = reserve_log_ids(len(records))
+        rows = pd.DataFrame(
+            [{**record, "id": log_id} for record, log_id in zip(records, ids)],
+            columns=JOURNAL_COLUMNS,
+        )
+        _append_csv(journal_file(), rows)
+
+    invalidate_cache()
+    _maybe_compact()
+
+
+@traced(category="storage")
+def delete_logs(ids) -> pd.DataFrame:
+    """
+    Delete rows by id without rewriting the snapshot.
+
+    Deletes are appended to the tombstone file in one write and applied on
+    load; compaction folds them into the snapshot. Journaled sessions that
+    were already merged into a deleted row go with it. Backends that
+    support upserts (SQLite) delete in place instead.
+
+    Args:
+        ids: Ids of the rows to delete
+
+    Returns:
+        pd.DataFrame: The deleted rows, as they were in the logs
+    """
+    ids = {int(i) for i in ids}
+    backend = get_storage_backend()
+
+    with transaction():
+        df = _load_stored()
+        deleted = df[df["id"].isin(ids)].reset_index(drop=True)
+        if deleted.empty:
+            return deleted
+
+        if backend.supports_upsert and not _has_pending_changes():
+            backend.delete(deleted["id"].tolist())
+        else:
+            journal = _read_journal()
+            merged = journal[_same_day_rows(journal, deleted)]
+            tombstones = pd.concat(
+                [deleted[TOMBSTONE_COLUMNS], merged[TOMBSTONE_COLUMNS]], ignore_index=True
+            )
+            _append_csv(tombstone_file(), tombstones)
+
+    invalidate_cache()
+    _maybe_compact()
+    return deleted
+
+
+@traced(category="storage")
+def compact_logs() -> None:
+    """
+    Fold the journal and tombstones into the snapshot and remove them.
+    Safe to call at any time; does nothing if there is nothing to fold.
+    """
+    with transaction():
+        if not _has_pending_changes():
+            return
+
+        before = logs_signature()
+        _compact()
+        after = logs_signature()
+        for hook in _compaction_hooks:
+            hook(before, after)
+
+
+def _compact() -> None:
+    """compact_logs inside the write lock."""
+    backend = get_storage_backend()
+    if not backend.partitioned:
+        save_logs(_load_stored())
+        return
+
+    # Only rewrite the months the journal and tombstones touch
+    journal = _read_journal()
+    months = set(zip(journal["year"].astype(int), journal["month"].astype(int)))
+    for day in _read_tombstones()["date"]:
+        months.add((int(day[:4]), int(day[5:7])))
+    months = sorted(months)
+    (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+    first = date(first_year, first_month, 1)
+    last = date(last_year, last_month, calendar.monthrange(last_year, last_month)[1])
+    df = _load_stored(first, last)
+
+    backend.write(df[COLUMNS], months=months)
+    _advance_sequence(df)
+    journal_file().unlink(missing_ok=True)
+    tombstone_file().unlink(missing_ok=True)
+    invalidate_cache()
+
+
+def _append_csv(path: Path, df: pd.DataFrame) -> None:
+    """
+    Append rows to a CSV in a single write, with a header if it is new.
+    Must be called inside transaction().
+    """
+    text = df.to_csv(header=not path.exists(), index=False)
+    with open(path, "a", encoding="utf-8", newline="") as handle:
+        handle.write(text)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _has_pending_changes() -> bool:
+    """Whether there are journaled sessions or tombstones to fold in."""
+    return journal_file().exists() or tombstone_file().exists()
+
+
+def _maybe_compact() -> None:
+    """Start a background compaction once the pending files grow too large."""
+    pending_bytes = sum(
+        path.stat().st_size for path in (journal_file(), tombstone_file()) if path.exists()
+    )
+    if pending_bytes >= COMPACT_THRESHOLD_BYTES:
+        compact_logs_async()
+
+
+def compact_logs_async() -> None:
+    """
+    Run compact_logs in a background thread unless one is already running
+    for the current workspace.
+    """
+    directory = data_dir()
+    with _locks_guard:
+        thread = _compaction_threads.get(directory)
+        if thread is not None and thread.is_alive():
+            return
+
+        # The thread runs in a copy of this context, so in this workspace
+        context = contextvars.copy_context()
+        thread = threading.Thread(
+            target=context.run, args=(compact_logs,), name="time-logs-compaction", daemon=True
+        )
+        _compaction_threads[directory] = thread
+        thread.start()
+
+
+# ============================
+# Ids
+# ============================
+
+def next_log_id() -> int:
+    """
+    Reserve and return the next row id.
+
+    Ids are never reused, even after deletes. The counter starts from the
+    highest stored id the first time it is needed.
+    """
+    return reserve_log_ids(1)[0]
+
+
+@traced(category="storage")
+def reserve_log_ids(count: int) -> range:
+    """
+    Reserve a block of consecutive row ids.
+
+    Args:
+        count (int): Number of ids
+
+    Returns:
+        range: The reserved ids
+    """
+    with transaction():
+        if sequence_file().exists():
+            last_id = int(sequence_file().read_text() or 0)
+        else:
+            df = merge_sessions(get_storage_backend().read(), _read_journal())
+            last_id = int(df["id"].max()) if not df.empty else 0
+
+        _write_sequence(last_id + count)
+    return range(last_id + 1, last_id + count + 1)
+
+
+def _advance_sequence(df: pd.DataFrame) -> None:
+    """Make sure future ids are above every id in `df`."""
+    if df.empty or not sequence_file().exists():
+        return
+
+    max_id = int(df["id"].max())
+    if max_id > int(sequence_file().read_text() or 0):
+        _write_sequence(max_id)
+
+
+def _write_sequence(last_id: int) -> None:
+    with atomic_path(sequence_file()) as tmp:
+        tmp.write_text(str(last_id))
+
+
+def _read_journal() -> pd.DataFrame:
+    """Read the journal, or return an empty frame if there is none."""
+    try:
+        return parse_timestamps(pd.read_csv(journal_file()))
+    except FileNotFoundError:
+        return pd.DataFrame(columns=JOURNAL_COLUMNS)
+
+
+def _read_tombstones() -> pd.DataFrame:
+    """Read the tombstones, or return an empty frame if there are none."""
+    try:
+        return pd.read_csv(tombstone_file(), dtype={"id": "int64", "date": str})
+    except FileNotFoundError:
+        return pd.DataFrame(columns=TOMBSTONE_COLUMNS)
+
+
+def _log_keys(df: pd.DataFrame) -> pd.Series:
+    """Same-day merge key: activity name and calendar date."""
+    return df["activity"].astype(str) + "|" + df["date"].astype(str)
+
+
+def _same_day_rows(df: pd.DataFrame, sessions: pd.DataFrame) -> pd.Series:
+    """
+    Rows of `df` sharing an (activity, date) with `sessions`.
+
+    Keys are only built for the rows of `df` with one of the activities of
+    `sessions`, so matching a few sessions against the whole logs costs
+    about one isin over the activity column.
+
+    Returns:
+        pd.Series: Boolean mask aligned with `df`
+    """
+    matches = df["activity"].isin(pd.unique(sessions["activity"].astype(str)))
+    if matches.any():
+        matches[matches] = _log_keys(df[matches]).isin(pd.unique(_log_keys(sessions)))
+    return matches
+
+
+def merge_sessions(df: pd.DataFrame, journal: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge sessions into logs with the same-day rule used by log_activity.
+
+    Sessions whose (activity, date) already has a row add their duration
+    to it; the remaining ones are grouped by (activity, date) and appended
+    as new rows, keeping the id of their first session. Used to replay the
+    journal and for bulk imports.
+
+    Args:
+        df (pd.DataFrame): Existing logs
+        journal (pd.DataFrame): Sessions in COLUMNS layout, oldest first
+
+    Returns:
+        pd.DataFrame: Logs with the journal applied, in COLUMNS order
+    """
+    if journal.empty:
+        return df
+
+    journal_keys = _log_keys(journal)
+    first = ~journal_keys.duplicated()
+
+    totals = journal.groupby(journal_keys, sort=False)["duration_seconds"].sum()
+    sessions = journal[first].set_index(journal_keys[first])
+    sessions["duration_seconds"] = totals
+
+    base = df[_same_day_rows(df, journal)]
+    base_positions = pd.Series(base.index, index=_log_keys(base))
+    base_positions = base_positions[~base_positions.index.duplicated()]
+
+    existing = sessions.index.isin(base_positions.index)
+    if existing.any():
+        df = df.copy()
+        targets = base_positions.loc[sessions.index[existing]].to_numpy()
+        df.loc[targets, "duration_seconds"] += (
+            sessions.loc[existing, "duration_seconds"].to_numpy()
+        )
+
+    new_rows = sessions[~existing].reset_index(drop=True)
+
+    if df.empty:
+        return new_rows[COLUMNS]
+
+    return pd.concat([df, new_rows[COLUMNS]], ignore_index=True)
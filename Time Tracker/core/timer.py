@@ -58,6 +58,6 @@ class Timer:
             "start_time": self.start_time,
             "end_time": self.end_time,
             "elapsed_seconds": self.elapsed_seconds(),
-            "period": get_period(self.start_time),
+            "period": get_period(self.start_time.hour),
             "is_running": self.is_running,
         }
\ No newline at end of file
@@ -0,0 +1,103 @@
+import contextvars
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# ============================
+# Workspaces
+# ============================
+#
+# Each workspace (a user or a team) keeps its logs, journal, rollups and
+# lock in a directory of its own, so users never read or lock each other's
+# rows. The workspace in use is a context variable: each Streamlit script
+# run sets it, and code running outside one uses DEFAULT_WORKSPACE.
+
+# Root of all data, resolved from this file rather than the working
+# directory ("Time Tracker/data" unless overridden)
+DATA_ROOT = Path(
+    os.environ.get("TIME_TRACKER_DATA_DIR", Path(__file__).resolve().parent.parent / "data")
+).resolve()
+
+# The default workspace lives directly in DATA_ROOT, where data was kept
+# before workspaces existed; the others live in DATA_ROOT/workspaces/<name>
+DEFAULT_WORKSPACE = os.environ.get("TIME_TRACKER_WORKSPACE", "default")
+
+WORKSPACE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+_current: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "time_tracker_workspace", default=None
+)
+
+
+def validate_workspace(name: str) -> str:
+    """
+    Check that a workspace name is safe to use as a directory name.
+
+    Args:
+        name (str): Workspace name
+
+    Returns:
+        str: The name
+
+    Raises:
+        ValueError: If the name has characters other than letters, digits,
+            "-" and "_", or is longer than 64 characters
+    """
+    if not WORKSPACE_NAME.match(name or ""):
+        raise ValueError(
+            f"Invalid workspace '{name}': use up to 64 letters, digits, '-' or '_'"
+        )
+    return name
+
+
+def current_workspace() -> str:
+    """Name of the workspace in use."""
+    return _current.get() or DEFAULT_WORKSPACE
+
+
+def set_workspace(name: str | None) -> str:
+    """
+    Use a workspace for the rest of the current context (e.g. a script run).
+
+    Args:
+        name (str | None): Workspace name, or None for DEFAULT_WORKSPACE
+
+    Returns:
+        str: The workspace now in use
+    """
+    _current.set(validate_workspace(name) if name else None)
+    return current_workspace()
+
+
+@contextmanager
+def use_workspace(name: str | None) -> Iterator[str]:
+    """
+    Use a workspace within a `with` block.
+
+    Args:
+        name (str | None): Workspace name, or None for DEFAULT_WORKSPACE
+    """
+    token = _current.set(validate_workspace(name) if name else None)
+    try:
+        yield current_workspace()
+    finally:
+        _current.reset(token)
+
+
+def workspace_dir(name: str | None = None) -> Path:
+    """
+    Absolute data directory of a workspace.
+
+    Args:
+        name (str | None): Workspace name, defaults to the current one
+
+    Returns:
+        Path: Directory holding the workspace's files
+    """
+    name = validate_workspace(name or current_workspace())
+    if name == DEFAULT_WORKSPACE:
+        return DATA_ROOT
+    return DATA_ROOT / "workspaces" / name
+
@@ -0,0 +1,367 @@
+import atexit
+import csv
+import io
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+import pandas as pd
+from core import storage
+from core.backends import atomic_path, parse_timestamps
+from core.workspaces import current_workspace, use_workspace
+
+# ============================
+# Write-behind queue
+# ============================
+#
+# Sessions are accepted into an in-memory queue and written to storage by
+# a background thread in batches, so saving never waits on storage.
+#
+# Every accepted session is first appended to this process's outbox file
+# (data_dir()/time_logs.outbox-<pid>-<token>.csv, fsynced) and a sidecar
+# records how many of its rows have been written. The random token keeps
+# a reused pid from naming the outbox of a dead process. The outbox stays
+# locked while the process lives; an unlocked outbox belongs to a process
+# that died, and its unwritten rows are handed to the writer thread the
+# next time the workspace queues a session.
+#
+# A batch is written and marked written in one storage.transaction(), with
+# a storage.record_intent() naming the sidecar count it commits. A process
+# dying in between leaves the intent behind, and the next writer advances
+# the sidecar if the logs changed, so a replay never writes a batch twice.
+
+# Most sessions written to storage in one batch
+BATCH_SIZE = int(os.environ.get("TIME_TRACKER_WRITE_BATCH_SIZE", 500))
+
+# How long the worker waits for more sessions before writing a batch
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("TIME_TRACKER_WRITE_INTERVAL", 0.5))
+
+# Backpressure: enqueue blocks while this many sessions are unwritten
+MAX_PENDING = int(os.environ.get("TIME_TRACKER_WRITE_MAX_PENDING", 10_000))
+
+# Pause before retrying a batch whose write failed
+RETRY_SECONDS = 1.0
+
+OUTBOX_PREFIX = "time_logs.outbox-"
+
+# Columns of an outbox row: a session record as built by log_activity
+RECORD_COLUMNS = [column for column in storage.COLUMNS if column != "id"]
+
+
+class WriteBehindQueue:
+    """
+    Queue of sessions waiting to be written, with one background writer.
+
+    Args:
+        writer (Callable[[list[dict]], None]): Writes a batch of session
+            records to the current workspace's storage
+    """
+
+    def __init__(self, writer: Callable[[list[dict]], None]):
+        self._writer = writer
+        self._cond = threading.Condition()
+        # Unwritten records, claimed orphan outboxes and open outbox per
+        # workspace, oldest first
+        self._pending: dict[str, list[dict]] = {}
+        self._orphans: dict[str, list["_Orphan"]] = {}
+        self._outboxes: dict[str, "_Outbox"] = {}
+        self._thread: threading.Thread | None = None
+        self._flushing = 0
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "errors": 0,
+            "recovered": 0,
+            "backpressure_waits": 0,
+            "max_pending": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "last_error": None,
+        }
+        storage.register_pending(self.pending)
+        atexit.register(self.flush, 5.0)
+
+    # ----------------------------
+    # Producer side
+    # ----------------------------
+
+    def enqueue(self, record: dict) -> None:
+        """
+        Accept a session for the current workspace.
+
+        Returns once the record is in the outbox; blocks only while
+        MAX_PENDING sessions are waiting (backpressure).
+
+        Args:
+            record (dict): Session values keyed by RECORD_COLUMNS
+        """
+        workspace = current_workspace()
+
+        with self._cond:
+            while self._count() >= MAX_PENDING:
+                self._stats["backpressure_waits"] += 1
+                self._cond.wait(FLUSH_INTERVAL_SECONDS)
+
+            outbox = self._outbox(workspace)
+            outbox.append(record)
+            self._pending.setdefault(workspace, []).append(record)
+
+            self._stats["enqueued"] += 1
+            self._stats["max_pending"] = max(self._stats["max_pending"], self._count())
+            self._start_worker()
+            self._cond.notify_all()
+
+    def pending(self, directory: Path) -> pd.DataFrame:
+        """
+        Unwritten sessions of the workspace stored in `directory`, for reads.
+
+        Rows get provisional negative ids until they are written.
+
+        Returns:
+            pd.DataFrame: Records in storage.COLUMNS layout, oldest first
+        """
+        with self._cond:
+            records = []
+            for workspace, outbox in self._outboxes.items():
+                if outbox.directory == directory:
+                    for orphan in self._orphans.get(workspace, []):
+                        records.extend(orphan.records)
+                    records.extend(self._pending.get(workspace, []))
+
+        if not records:
+            return pd.DataFrame(columns=storage.COLUMNS)
+
+        df = pd.DataFrame(records, columns=RECORD_COLUMNS)
+        df.insert(0, "id", range(-1, -len(df) - 1, -1))
+        df["date"] = df["date"].astype(str)
+        return df
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued session is written.
+
+        Args:
+            timeout (float | None): Seconds to wait at most
+
+        Returns:
+            bool: True if the queue is empty
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # Tells the worker not to wait for a fuller batch
+            self._flushing += 1
+            try:
+                while self._count():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.notify_all()
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing -= 1
+        return True
+
+    def stats(self) -> dict:
+        """
+        Return queue metrics.
+
+        Returns:
+            dict: "pending" (now), "max_pending" (high-water mark),
+                "enqueued", "written", "batches", "errors", "recovered",
+                "backpressure_waits", "last_batch_size", "last_flush_ms"
+                and "last_error"
+        """
+        with self._cond:
+            return {**self._stats, "pending": self._count()}
+
+    # ----------------------------
+    # Writer side
+    # ----------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._count():
+                    self._cond.wait()
+
+                # Give a burst of sessions the chance to land in one batch
+                deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+                while self._count() < BATCH_SIZE and not self._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # Orphans first, each in one batch: their sidecar counts rows
+                workspace, orphan = next(
+                    ((name, orphans[0]) for name, orphans in self._orphans.items() if orphans),
+                    (None, None),
+                )
+                if orphan is None:
+                    workspace = next(name for name, queued in self._pending.items() if queued)
+                    batch = list(self._pending[workspace][:BATCH_SIZE])
+                    outbox = self._outboxes[workspace]
+                    commit_file, written = outbox.written_path, outbox.written + len(batch)
+
+            started = time.perf_counter()
+            try:
+                with use_workspace(workspace), storage.transaction():
+                    if orphan is not None:
+                        # Taking the lock settled any write its process died in
+                        with self._cond:
+                            orphan.load()
+                        batch = orphan.records
+                        commit_file, written = orphan.written_path, orphan.written + len(batch)
+
+                    if batch:
+                        storage.record_intent(commit_file, str(written))
+                        try:
+                            self._writer(batch)
+                        except Exception as error:
+                            if not storage.resolve_intent():
+                                raise
+                            # The sessions were written, only a later step failed
+                            with self._cond:
+                                self._stats["errors"] += 1
+                                self._stats["last_error"] = repr(error)
+
+                    with self._cond:
+                        if orphan is not None:
+                            self._orphans[workspace].remove(orphan)
+                            orphan.close()
+                            self._stats["recovered"] += len(batch)
+                        else:
+                            queued = self._pending[workspace]
+                            del queued[:len(batch)]
+                            outbox.mark_written(len(batch), empty=not queued)
+                        # Before any other append to the outbox
+                        storage.clear_intent()
+
+                        if batch:
+                            self._stats["written"] += len(batch)
+                            self._stats["batches"] += 1
+                            self._stats["last_batch_size"] = len(batch)
+                            self._stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+                        self._cond.notify_all()
+            except Exception as error:
+                with self._cond:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = repr(error)
+                time.sleep(RETRY_SECONDS)
+
+    def _start_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="time-logs-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _count(self) -> int:
+        return sum(len(queued) for queued in self._pending.values()) + sum(
+            len(orphan.records) for orphans in self._orphans.values() for orphan in orphans
+        )
+
+    def _outbox(self, workspace: str) -> "_Outbox":
+        """Open this process's outbox for a workspace, claiming orphans first."""
+        outbox = self._outboxes.get(workspace)
+        if outbox is None:
+            directory = storage.data_dir()
+            orphans = _claim_orphans(directory)
+            self._orphans[workspace] = [orphan for orphan in orphans if orphan.records]
+            for orphan in orphans:
+                if not orphan.records:
+                    orphan.close()
+            outbox = self._outboxes[workspace] = _Outbox(directory)
+        return outbox
+
+
+class _Outbox:
+    """Append-only, fsynced file of queued sessions, locked while in use."""
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.path = directory / f"{OUTBOX_PREFIX}{os.getpid()}-{secrets.token_hex(4)}.csv"
+        self.written_path = _written_path(self.path)
+        self._handle = open(self.path, "a+b")
+        # A new file: nothing else can hold it, and enqueue must not block here
+        if not storage._lock_file(self._handle, blocking=False):
+            raise RuntimeError(f"Outbox {self.path} is locked by another process")
+        # Rows written so far, as in the sidecar
+        self.written = 0
+
+    def append(self, record: dict) -> None:
+        # The csv module, not pandas: this runs on every save
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if self._handle.tell() == 0:
+            writer.writerow(RECORD_COLUMNS)
+        writer.writerow(["" if record.get(column) is None else record[column]
+                         for column in RECORD_COLUMNS])
+
+        self._handle.write(buffer.getvalue().encode("utf-8"))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def mark_written(self, count: int, empty: bool) -> None:
+        """Record that `count` more rows were written; truncate once drained."""
+        if empty:
+            # Truncate first: a crash in between leaves nothing to replay
+            self._handle.truncate(0)
+            os.fsync(self._handle.fileno())
+            self.written = 0
+            self.written_path.unlink(missing_ok=True)
+            return
+
+        self.written += count
+        with atomic_path(self.written_path) as tmp:
+            tmp.write_text(str(self.written))
+
+
+def _written_path(outbox: Path) -> Path:
+    return outbox.with_suffix(".written")
+
+
+class _Orphan:
+    """Outbox of a dead process, locked by this one until its rows are written."""
+
+    def __init__(self, path: Path, handle):
+        self.path = path
+        self.written_path = _written_path(path)
+        self._handle = handle
+        self.load()
+
+    def load(self) -> None:
+        """Read the rows not yet written, per the sidecar."""
+        self.written = int(self.written_path.read_text() or 0) if self.written_path.exists() else 0
+        self.records: list[dict] = []
+        if self.path.stat().st_size:
+            rows = parse_timestamps(pd.read_csv(self.path)).iloc[self.written:]
+            self.records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+    def close(self) -> None:
+        """Delete the outbox once its rows are written, then release it."""
+        self.path.unlink()
+        self.written_path.unlink(missing_ok=True)
+        storage._unlock_file(self._handle)
+        self._handle.close()
+
+
+def _claim_orphans(directory: Path) -> list[_Orphan]:
+    """
+    Lock the outboxes left behind by dead processes, for the writer thread.
+
+    Returns:
+        list[_Orphan]: Claimed outboxes, with their unwritten rows
+    """
+    orphans = []
+    for path in sorted(directory.glob(f"{OUTBOX_PREFIX}*.csv")):
+        handle = open(path, "a+b")
+        if not storage._lock_file(handle, blocking=False):
+            handle.close()
+            continue  # Still owned by a live process
+        orphans.append(_Orphan(path, handle))
+    return orphans
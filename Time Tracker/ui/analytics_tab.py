@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from core.storage import load_logs
+from core.rollups import ensure_rollups, load_rollups, rollup_date_range
+from utils.profiling import span
 
 
 def show_analytics_tab():
@@ -9,33 +10,20 @@ def show_analytics_tab():
     st.subheader("Understand your productivity patterns")
 
     # -------------------------
-    # Load logs
+    # Load rollups
     # -------------------------
-    df = load_logs()
-    if df.empty:
+    # Pre-aggregated per local (DISPLAY_TIMEZONE) day, so the work below
+    # depends on the selected range rather than the whole history
+    ensure_rollups()
+    bounds = rollup_date_range()
+    if bounds is None:
         st.info("No logs yet. Start logging activities first!")
         return
 
-    # -------------------------
-    # Datetime handling (CRITICAL FIX)
-    # -------------------------
-    df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
-    df['end_time'] = pd.to_datetime(df['end_time'], utc=True)
-
-    df['duration_hours'] = df['duration_seconds'] / 3600
-
-    # Convert UTC → Asia/Manila, then remove tz for Altair
-    df['start_time_local'] = (
-        df['start_time']
-        .dt.tz_convert('Asia/Manila')
-        .dt.tz_localize(None)
-    )
-
     # -------------------------
     # Filter by timeframe
     # -------------------------
-    min_date = df['start_time_local'].min().date()
-    max_date = df['start_time_local'].max().date()
+    min_date, max_date = bounds
 
     start_date, end_date = st.date_input(
         "Select date range",
@@ -44,38 +32,25 @@ def show_analytics_tab():
         max_value=max_date
     )
 
-    filtered_df = df[
-        (df['start_time_local'].dt.date >= start_date) &
-        (df['start_time_local'].dt.date <= end_date)
-    ]
+    rollups = load_rollups(start_date, end_date)
+    daily = rollups["daily"]
 
-    if filtered_df.empty:
+    if daily.empty:
         st.warning("No activities in the selected timeframe.")
         return
 
     # -------------------------
     # Metrics
     # -------------------------
-    total_hours = filtered_df['duration_hours'].sum()
+    daily_hours = daily['seconds'] / 3600
 
-    daily_hours = (
-        filtered_df
-        .groupby(filtered_df['start_time_local'].dt.date)['duration_hours']
-        .sum()
-    )
+    total_hours = daily_hours.sum()
     avg_daily = daily_hours.mean()
 
-    total_sessions = len(filtered_df)
+    total_sessions = int(daily['sessions'].sum())
 
-    top_category = (
-        filtered_df['category'].mode().iloc[0]
-        if not filtered_df['category'].dropna().empty else "N/A"
-    )
-
-    top_mood = (
-        filtered_df['mood'].mode().iloc[0]
-        if not filtered_df['mood'].dropna().empty else "N/A"
-    )
+    top_category = _most_common(rollups["category"], 'category')
+    top_mood = _most_common(rollups["mood"], 'mood')
 
     # -------------------------
     # Display metrics
@@ -92,90 +67,92 @@ def show_analytics_tab():
     # -------------------------
     # Weekly Bar Graph
     # -------------------------
-    filtered_df['weekday'] = filtered_df['start_time_local'].dt.day_name()
-
     weekday_order = [
         'Monday', 'Tuesday', 'Wednesday',
         'Thursday', 'Friday', 'Saturday', 'Sunday'
     ]
 
     weekly_hours = (
-        filtered_df
-        .groupby('weekday')['duration_hours']
-        .sum()
-        .reindex(weekday_order, fill_value=0)
+        rollups["weekday"]
+        .set_index('weekday')['seconds']
+        .div(3600)
+        .reindex(range(7), fill_value=0)
+        .set_axis(weekday_order)
+        .rename_axis('weekday')
+        .rename('duration_hours')
         .reset_index()
     )
 
     st.subheader("How much time do I spend on each day of the week?")
-    weekly_chart = alt.Chart(weekly_hours).mark_bar(color="#FFD700").encode(
-        x=alt.X('weekday:N', sort=weekday_order, title='Day of Week'),
-        y=alt.Y('duration_hours:Q', title='Total Hours'),
-        tooltip=[
-            alt.Tooltip('weekday:N', title='Day'),
-            alt.Tooltip('duration_hours:Q', title='Hours', format='.2f')
-        ]
-    ).properties(height=400)
-
-    st.altair_chart(weekly_chart, use_container_width=True)
+    with span("weekly chart", "chart"):
+        weekly_chart = alt.Chart(weekly_hours).mark_bar(color="#FFD700").encode(
+            x=alt.X('weekday:N', sort=weekday_order, title='Day of Week'),
+            y=alt.Y('duration_hours:Q', title='Total Hours'),
+            tooltip=[
+                alt.Tooltip('weekday:N', title='Day'),
+                alt.Tooltip('duration_hours:Q', title='Hours', format='.2f')
+            ]
+        ).properties(height=400)
+
+        st.altair_chart(weekly_chart, use_container_width=True)
 
     st.markdown("---")
 
     # -------------------------
-    # Mood–Activity–Time Correlation (24-hour, date-independent, exact time)
+    # Mood–Activity–Time Correlation (24-hour, date-independent)
     # -------------------------
-    
-    # Extract exact time of day AFTER filtering
-    filtered_df = filtered_df.copy()
-    filtered_df['hour_float'] = (
-        filtered_df['start_time_local'].dt.hour +
-        filtered_df['start_time_local'].dt.minute / 60 +
-        filtered_df['start_time_local'].dt.second / 3600
-    )
-    
+
+    # Time of day comes from the rollup's 15-minute buckets
     mood_time = (
-        filtered_df
-        .groupby(['hour_float', 'activity', 'mood'], as_index=False)['duration_hours']
-        .sum()
+        rollups["hourly"]
+        .rename(columns={'hour_bucket': 'hour_float'})
+        .assign(duration_hours=lambda d: d['seconds'] / 3600)
     )
     
-    mood_time_chart = alt.Chart(mood_time).mark_circle(
-        size=70,
-        opacity=0.7
-    ).encode(
-        x=alt.X(
-            'hour_float:Q',
-            title='What time of day does this usually happen?',
-            scale=alt.Scale(domain=[0, 24], nice=False),
-            axis=alt.Axis(
-                values=list(range(0, 25)),
-                labelExpr="""
-                    datum.value == 0 ? '12 AM' :
-                    datum.value < 12 ? datum.value + ' AM' :
-                    datum.value == 12 ? '12 PM' :
-                    (datum.value - 12) + ' PM'
-                """
-            )
-        ),
-        y=alt.Y(
-            'duration_hours:Q',
-            title='How long did it last? (hours)'
-        ),
-        color=alt.Color(
-            'mood:N',
-            legend=alt.Legend(title="Mood")
-        ),
-        tooltip=[
-            alt.Tooltip('activity:N', title='Activity'),
-            alt.Tooltip('mood:N', title='Mood'),
-            alt.Tooltip('duration_hours:Q', title='Hours', format='.2f'),
-            alt.Tooltip('hour_float:Q', title='Exact Time', format='.2f')
-        ]
-    ).properties(height=400)
-    
-    st.subheader("🕒 When during the day do I feel and perform this way?")
-    st.altair_chart(mood_time_chart, use_container_width=True)
-    
-
-
-
+    with span("mood and time chart", "chart"):
+        mood_time_chart = alt.Chart(mood_time).mark_circle(
+            size=70,
+            opacity=0.7
+        ).encode(
+            x=alt.X(
+                'hour_float:Q',
+                title='What time of day does this usually happen?',
+                scale=alt.Scale(domain=[0, 24], nice=False),
+                axis=alt.Axis(
+                    values=list(range(0, 25)),
+                    labelExpr="""
+                        datum.value == 0 ? '12 AM' :
+                        datum.value < 12 ? datum.value + ' AM' :
+                        datum.value == 12 ? '12 PM' :
+                        (datum.value - 12) + ' PM'
+                    """
+                )
+            ),
+            y=alt.Y(
+                'duration_hours:Q',
+                title='How long did it last? (hours)'
+            ),
+            color=alt.Color(
+                'mood:N',
+                legend=alt.Legend(title="Mood")
+            ),
+            tooltip=[
+                alt.Tooltip('activity:N', title='Activity'),
+                alt.Tooltip('mood:N', title='Mood'),
+                alt.Tooltip('duration_hours:Q', title='Hours', format='.2f'),
+                alt.Tooltip('hour_float:Q', title='Time', format='.2f')
+            ]
+        ).properties(height=400)
+
+        st.subheader("🕒 When during the day do I feel and perform this way?")
+        st.altair_chart(mood_time_chart, use_container_width=True)
+
+
+def _most_common(counts: pd.DataFrame, column: str) -> str:
+    """
+    Label with the most sessions, ties broken alphabetically like Series.mode().
+    """
+    if counts.empty:
+        return "N/A"
+    top = counts[counts['sessions'] == counts['sessions'].max()]
+    return top[column].min()
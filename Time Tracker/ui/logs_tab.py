@@ -1,51 +1,121 @@
+import math
 import streamlit as st
-from core.storage import load_logs, save_logs
+from core.rollups import remove_logs, rollups_in_sync
+from core.workspaces import use_workspace
+from core.storage import (
+    delete_logs,
+    export_logs_csv,
+    log_filter_options,
+    query_logs,
+    transaction,
+)
+from utils.profiling import span
 import pandas as pd
 
+# Sessions rendered per page; only these rows are formatted and drawn
+PAGE_SIZE = 20
+
+ALL = "All"
+
+
+def format_duration(total_time: int) -> str:
+    """Format seconds as "Hh Mm Ss"."""
+    hours = total_time // 3600
+    minutes = (total_time % 3600) // 60
+    seconds = total_time % 60
+    return f"{hours}h {minutes}m {seconds}s"
+
+
+def _go_to_page(page: int):
+    st.session_state.logs_page = page
+
+
+def _delete(ids: list[int]):
+    """Delete logs in one storage write and keep the rollups in step."""
+    # Callbacks run before app.py sets the workspace for this run
+    with use_workspace(st.session_state.get("active_workspace")), transaction():
+        update_rollups = rollups_in_sync()
+        deleted = delete_logs(ids)
+        if update_rollups and not deleted.empty:
+            remove_logs(deleted)
+
+
 def show_logs_tab():
 
-    # Load logs
-    df = load_logs()
-    if df.empty:
+    options = log_filter_options()
+    if not options["activity"]:
         st.info("No logs yet. Start logging activities first!")
         return
 
-    # Initialize session_state for removed ids
-    if "removed_ids" not in st.session_state:
-        st.session_state.removed_ids = set()
+    # Initialize session_state for the current page
+    if "logs_page" not in st.session_state:
+        st.session_state.logs_page = 0
+
+    # Filters, applied by storage before anything is rendered
+    col_activity, col_category, col_mood, col_dates = st.columns(4)
+    with col_activity:
+        activity = st.selectbox("Activity", [ALL] + options["activity"], key="logs_activity")
+    with col_category:
+        category = st.selectbox("Category", [ALL] + options["category"], key="logs_category")
+    with col_mood:
+        mood = st.selectbox("Mood", [ALL] + options["mood"], key="logs_mood")
+    with col_dates:
+        dates = st.date_input("Dates", value=(), key="logs_dates")
+
+    filters = {
+        "activity": None if activity == ALL else activity,
+        "category": None if category == ALL else category,
+        "mood": None if mood == ALL else mood,
+    }
+    start, end = dates if len(dates) == 2 else (None, None)
+
+    # Back to the first page whenever the filters change
+    view = (tuple(filters.items()), start, end)
+    if st.session_state.get("logs_view") != view:
+        st.session_state.logs_view = view
+        st.session_state.logs_page = 0
 
-    # Sort newest first
-    df_sorted = df.sort_values(by="start_time", ascending=False).reset_index(drop=True)
+    page = st.session_state.logs_page
+    page_df, total = query_logs(filters, start, end, offset=page * PAGE_SIZE, limit=PAGE_SIZE)
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    if page >= pages:
+        page = st.session_state.logs_page = pages - 1
+        page_df, total = query_logs(filters, start, end, offset=page * PAGE_SIZE, limit=PAGE_SIZE)
 
+    if total == 0:
+        st.info("No logs match these filters.")
 
-    for idx, row in df_sorted.iterrows():
-        # Skip removed activities
-        if row["id"] in st.session_state.removed_ids:
-            continue
+    with span("logs page rows", "render"):
+        for idx, row in page_df.iterrows():
+            duration_str = format_duration(row["duration_seconds"])
 
-        total_time = row["duration_seconds"]
-        hours = total_time // 3600
-        minutes = (total_time % 3600) // 60
-        seconds = total_time % 60
-        duration_str = f"{hours}h {minutes}m {seconds}s"
+            # Unique key for remove button
+            remove_key = f"remove_{row['id']}_{idx}"
 
-        # Unique key for remove button
-        remove_key = f"remove_{row['id']}_{idx}"
+            with st.container():
+                col1, col2 = st.columns([8, 1])
+                with col1:
+                    st.markdown(f"### {row['activity']} — {duration_str}")
+                    st.markdown(f"*Category: {row['category']} | Mood: {row['mood']}*")
+                with col2:
+                    # Queued sessions (negative ids) can be deleted once written
+                    if row["id"] < 0:
+                        st.caption("Saving…")
+                    else:
+                        st.button("❌", key=remove_key, on_click=_delete, args=([row["id"]],))
 
-        with st.container():
-            col1, col2 = st.columns([8, 1])
-            with col1:
-                st.markdown(f"### {row['activity']} — {duration_str}")
-                st.markdown(f"*Category: {row['category']} | Mood: {row['mood']}*")
-            with col2:
-                if st.button("❌", key=remove_key):
-                    # Remove immediately
-                    st.session_state.removed_ids.add(row["id"])
-                    df = df[df["id"] != row["id"]].reset_index(drop=True)
-                    save_logs(df)
+                st.markdown("---")
 
-            st.markdown("---")
+    # Pagination
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        st.button("◀ Newer", key="logs_prev", disabled=page == 0,
+                  on_click=_go_to_page, args=(page - 1,))
+    with col_info:
+        st.caption(f"Page {page + 1} of {pages} · {total} sessions")
+    with col_next:
+        st.button("Older ▶", key="logs_next", disabled=page >= pages - 1,
+                  on_click=_go_to_page, args=(page + 1,))
 
     # Download CSV
-    csv = df.to_csv(index=False)
-    st.download_button("Download Logs CSV", csv, "time_logs.csv", "text/csv")
+    st.download_button("Download Logs CSV", export_logs_csv(), "time_logs.csv", "text/csv")
@@ -0,0 +1,52 @@
+import pandas as pd
+import streamlit as st
+from utils.profiling import PROFILE_HISTORY, Trace, chrome_trace
+
+
+def format_bytes(count: int | None) -> str:
+    """Signed memory delta, e.g. "+1.5 MB"; blank when unknown."""
+    if count is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if abs(count) < 1024:
+            return f"{count:+.0f} {unit}" if unit == "B" else f"{count:+.1f} {unit}"
+        count /= 1024
+    return f"{count:+.1f} GB"
+
+
+def show_profile_panel(trace: Trace) -> None:
+    """
+    Sidebar panel with the spans of the finished run and a trace download.
+
+    The last PROFILE_HISTORY runs of the session are kept, so the download
+    covers the reruns leading up to a slow one too.
+    """
+    history = st.session_state.setdefault("profile_traces", [])
+    history.append(trace)
+    del history[:-PROFILE_HISTORY]
+
+    with st.sidebar.expander("Profiler", expanded=True):
+        st.caption(
+            f"Last run {trace.duration_ms:.0f} ms · memory {format_bytes(trace.memory_delta)}"
+        )
+
+        totals = trace.totals()
+        if totals:
+            st.caption(" · ".join(f"{category} {ms:.0f} ms" for category, ms in totals.items()))
+
+        if trace.spans:
+            spans = pd.DataFrame({
+                "span": ["  " * span["depth"] + span["name"] for span in trace.spans],
+                "category": [span["category"] for span in trace.spans],
+                "ms": [round(span["duration_ms"], 1) for span in trace.spans],
+                "memory": [format_bytes(span["memory_delta"]) for span in trace.spans],
+            })
+            st.dataframe(spans, hide_index=True, use_container_width=True)
+
+        st.download_button(
+            f"Download trace ({len(history)} runs)",
+            chrome_trace(history),
+            "time_tracker_trace.json",
+            "application/json",
+            key="profile_download",
+        )
@@ -2,29 +2,99 @@ import streamlit as st
 from datetime import datetime
 from core.timer import Timer
 from core.logging import log_activity
-from streamlit_autorefresh import st_autorefresh
+from core.schema import CATEGORIES, MOODS
 
 # -------------------------
 # Categories and Moods with emojis
 # -------------------------
-CATEGORY_OPTIONS = {
-    "Work": "💼 Work",
-    "Study": "📚 Study",
-    "Exercise": "🏋️ Exercise",
-    "Leisure": "🎮 Leisure",
-    "Chores": "🧹 Chores",
-    "Other": "❓ Other"
+# The values themselves are core.schema's; only the emojis live here
+CATEGORY_EMOJIS = {
+    "Work": "💼",
+    "Study": "📚",
+    "Exercise": "🏋️",
+    "Leisure": "🎮",
+    "Chores": "🧹",
 }
 
-MOOD_OPTIONS = {
-    "Focused": "🧠 Focused",
-    "Relaxed": "😌 Relaxed",
-    "Stressed": "😫 Stressed",
-    "Happy": "😄 Happy",
-    "Tired": "😴 Tired",
-    "Other": "❓ Other"
+MOOD_EMOJIS = {
+    "Focused": "🧠",
+    "Relaxed": "😌",
+    "Stressed": "😫",
+    "Happy": "😄",
+    "Tired": "😴",
 }
 
+CATEGORY_OPTIONS = {
+    category: f"{CATEGORY_EMOJIS.get(category, '❓')} {category}" for category in CATEGORIES
+}
+MOOD_OPTIONS = {mood: f"{MOOD_EMOJIS.get(mood, '❓')} {mood}" for mood in MOODS}
+
+# -------------------------
+# Client-side timer display
+# -------------------------
+# The browser ticks the clock itself, starting from the elapsed time at
+# render, so the server only reruns on Start / Stop / Save.
+TIMER_DISPLAY_HTML = """
+<h1 id="timer" style="font-family: 'Source Sans Pro', sans-serif; font-size: 72px;
+    font-weight: 700; text-align: left; margin: 0; color: {color};">{initial}</h1>
+<script>
+  const elapsedAtRender = {elapsed};
+  const renderedAt = Date.now();
+  const pad = (n) => String(n).padStart(2, "0");
+  const tick = () => {{
+    const total = elapsedAtRender + Math.floor((Date.now() - renderedAt) / 1000);
+    const h = Math.floor(total / 3600), m = Math.floor((total % 3600) / 60), s = total % 60;
+    document.getElementById("timer").textContent = `${{pad(h)}}:${{pad(m)}}:${{pad(s)}}`;
+  }};
+  setInterval(tick, 1000);
+</script>
+"""
+
+
+def format_elapsed(elapsed_seconds: int) -> str:
+    """Format seconds as HH:MM:SS."""
+    hours = elapsed_seconds // 3600
+    minutes = (elapsed_seconds % 3600) // 60
+    seconds = elapsed_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def show_timer_display(timer: Timer):
+    """Render the clock; it only ticks (in the browser) while running."""
+    elapsed_seconds = timer.elapsed_seconds()
+
+    if not timer.is_running:
+        st.markdown(
+            f"<h1 style='font-size:72px; text-align:left;'>{format_elapsed(elapsed_seconds)}</h1>",
+            unsafe_allow_html=True
+        )
+        return
+
+    # Match the app's text color in light and dark themes
+    color = st.get_option("theme.textColor") or "inherit"
+    # An iframe, so the script runs (st.html would strip it)
+    st.iframe(
+        TIMER_DISPLAY_HTML.format(
+            elapsed=elapsed_seconds,
+            initial=format_elapsed(elapsed_seconds),
+            color=color,
+        ),
+        height=100,
+    )
+
+
+def toggle_timer():
+    """Start/Stop callback; runs before the rerun so the UI is current."""
+    timer = st.session_state.timer
+    if timer.is_running:
+        timer.stop()
+        st.session_state.end_time = datetime.now()
+    else:
+        timer.start()
+        st.session_state.start_time = datetime.now()
+        st.session_state.end_time = None
+
+
 def show_timer_tab():
     # -------------------------
     # Initialize session_state
@@ -38,11 +108,6 @@ def show_timer_tab():
 
     timer = st.session_state.timer
 
-    # -------------------------
-    # Auto-refresh every 1 second
-    # -------------------------
-    st_autorefresh(interval=1000, key="timer_autorefresh")
-
     # -------------------------
     # Custom CSS to remove extra margins
     # -------------------------
@@ -66,31 +131,24 @@ def show_timer_tab():
     )
 
     # -------------------------
-    # Timer display (left-aligned)
+    # Message from the last save (shown after its rerun)
     # -------------------------
-    elapsed_td = timer.elapsed()
-    elapsed_seconds = int(elapsed_td.total_seconds())
-    hours = elapsed_seconds // 3600
-    minutes = (elapsed_seconds % 3600) // 60
-    seconds = elapsed_seconds % 60
+    if "timer_message" in st.session_state:
+        st.success(st.session_state.pop("timer_message"))
 
-    st.markdown(
-        f"<h1 style='font-size:72px; text-align:left;'>{hours:02d}:{minutes:02d}:{seconds:02d}</h1>",
-        unsafe_allow_html=True
-    )
+    # -------------------------
+    # Timer display (left-aligned)
+    # -------------------------
+    show_timer_display(timer)
 
     # -------------------------
     # Left-aligned toggle button (Start / Stop)
     # -------------------------
-    if timer.is_running:
-        if st.button("Stop", key="timer_toggle"):
-            timer.stop()
-            st.session_state.end_time = datetime.now()
-    else:
-        if st.button("Start", key="timer_toggle"):
-            timer.start()
-            st.session_state.start_time = datetime.now()
-            st.session_state.end_time = None
+    st.button(
+        "Stop" if timer.is_running else "Start",
+        key="timer_toggle",
+        on_click=toggle_timer
+    )
 
     # -------------------------
     # Show log input only after stopping
@@ -122,8 +180,9 @@ def show_timer_tab():
                 st.error("Start the timer first!")
             else:
                 log_activity(activity_name, category, mood, start_time, end_time)
-                st.success(f"Activity '{activity_name}' logged!")
+                st.session_state.timer_message = f"Activity '{activity_name}' logged!"
                 timer.reset()
                 st.session_state.start_time = None
                 st.session_state.end_time = None
+                st.rerun()
 
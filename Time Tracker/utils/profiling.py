@@ -0,0 +1,232 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator
+
+# ============================
+# Rerun profiling
+# ============================
+#
+# Spans time a block of code (storage I/O, an aggregation, a chart) and
+# the memory it added. They are collected into a Trace per Streamlit
+# script run, shown by ui.profile_panel and exportable in the Chrome
+# trace format (chrome://tracing, https://ui.perfetto.dev).
+#
+# Off by default. Whether profiling is on is decided once at import, so
+# when it is off `traced` returns the function unchanged and `span` returns
+# a shared no-op context: instrumented code runs exactly as before.
+
+# "1" records timings and resident memory; "memory" also turns on
+# tracemalloc for exact allocation deltas (slower, skews timings)
+PROFILE_MODE = os.environ.get("TIME_TRACKER_PROFILE", "0")
+PROFILING = PROFILE_MODE in ("1", "memory")
+
+# Reruns kept for the panel and the trace export
+PROFILE_HISTORY = int(os.environ.get("TIME_TRACKER_PROFILE_HISTORY", 20))
+
+_NO_SPAN = nullcontext()
+
+_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar(
+    "time_tracker_trace", default=None
+)
+# Categories of the spans open in this context, outermost first
+_open: contextvars.ContextVar[tuple[str, ...]] = contextvars.ContextVar(
+    "time_tracker_open_spans", default=()
+)
+
+if PROFILE_MODE == "memory" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class Trace:
+    """
+    Spans recorded during one script run.
+
+    Args:
+        name (str): What ran, e.g. "rerun"
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.thread = threading.get_ident()
+        self.wall_start = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.memory_start = memory_bytes()
+        self.memory_delta: int | None = None
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict) -> None:
+        # Background threads that copied the context may finish late
+        with self._lock:
+            if self.duration_ms is None:
+                self.spans.append(span)
+
+    def finish(self) -> None:
+        with self._lock:
+            if self.duration_ms is None:
+                self.duration_ms = (time.perf_counter() - self.started) * 1000
+                end = memory_bytes()
+                if end is not None and self.memory_start is not None:
+                    self.memory_delta = end - self.memory_start
+
+    def totals(self) -> dict[str, float]:
+        """
+        Milliseconds per category, counting only top-level spans of each
+        category so nested spans are not added twice.
+        """
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            if not span["nested_in_category"]:
+                totals[span["category"]] = totals.get(span["category"], 0.0) + span["duration_ms"]
+        return totals
+
+
+def memory_bytes() -> int | None:
+    """
+    Current memory use: traced allocations under tracemalloc, otherwise
+    the resident set size (Linux), otherwise None.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def start_trace(name: str = "rerun") -> "Trace | None":
+    """
+    Start collecting spans for the current context (e.g. a script run).
+
+    Returns:
+        Trace | None: The new trace, or None when profiling is off
+    """
+    if not PROFILING:
+        return None
+    trace = Trace(name)
+    _trace.set(trace)
+    _open.set(())
+    return trace
+
+
+def current_trace() -> "Trace | None":
+    """Trace collecting spans in this context, if any."""
+    return _trace.get()
+
+
+def span(name: str, category: str = "app"):
+    """
+    Context manager recording how long a block takes and the memory it adds.
+
+    Args:
+        name (str): Span name shown in the panel and the trace
+        category (str): Group, e.g. "storage", "aggregate", "chart" or "view"
+    """
+    if not PROFILING:
+        return _NO_SPAN
+    return _span(name, category)
+
+
+@contextmanager
+def _span(name: str, category: str) -> Iterator[None]:
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+
+    parents = _open.get()
+    token = _open.set(parents + (category,))
+    memory_start = memory_bytes()
+    started = time.perf_counter()
+    record = {
+        "name": name,
+        "category": category,
+        "start_ms": (started - trace.started) * 1000,
+        "duration_ms": 0.0,
+        "memory_delta": None,
+        "depth": len(parents),
+        "thread": threading.get_ident(),
+        "nested_in_category": category in parents,
+    }
+    trace.add(record)
+    try:
+        yield
+    finally:
+        record["duration_ms"] = (time.perf_counter() - started) * 1000
+        memory_end = memory_bytes()
+        if memory_start is not None and memory_end is not None:
+            record["memory_delta"] = memory_end - memory_start
+        _open.reset(token)
+
+
+def traced(name: str | None = None, category: str = "app") -> Callable:
+    """
+    Decorator recording every call of a function as a span.
+
+    Returns the function itself when profiling is off.
+
+    Args:
+        name (str | None): Span name, defaults to module.function
+        category (str): Span category (see span)
+    """
+    def decorate(func: Callable) -> Callable:
+        if not PROFILING:
+            return func
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return func(*args, **kwargs)
+            with _span(label, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def chrome_trace(traces: Iterable[Trace]) -> str:
+    """
+    Export traces in the Chrome trace event format.
+
+    Each trace becomes a "rerun" slice with its spans nested under it by
+    time, on the thread that ran them.
+
+    Returns:
+        str: JSON to open in chrome://tracing or Perfetto
+    """
+    pid = os.getpid()
+    events = []
+    for trace in traces:
+        base = trace.wall_start * 1_000_000
+        events.append({
+            "name": trace.name,
+            "cat": "rerun",
+            "ph": "X",
+            "ts": base,
+            "dur": (trace.duration_ms or 0.0) * 1000,
+            "pid": pid,
+            "tid": trace.thread,
+            "args": {"memory_delta_bytes": trace.memory_delta},
+        })
+        for record in trace.spans:
+            events.append({
+                "name": record["name"],
+                "cat": record["category"],
+                "ph": "X",
+                "ts": base + record["start_ms"] * 1000,
+                "dur": record["duration_ms"] * 1000,
+                "pid": pid,
+                "tid": record["thread"],
+                "args": {"memory_delta_bytes": record["memory_delta"]},
+            })
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
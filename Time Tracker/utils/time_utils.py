@@ -1,3 +1,7 @@
+import os
+import numpy as np
+import pandas as pd
+
 # =================================
 # Time-of-day helper functions
 # =================================
@@ -21,4 +25,79 @@ def get_period(hour: int) -> str:
     """
     Convert an hour (0-23) into a broad time period.
     """
-    return "AM" if hour < 12 else "PM"
\ No newline at end of file
+    return "AM" if hour < 12 else "PM"
+
+# =================================
+# Vectorized (whole-column) versions
+# =================================
+
+# Category order of the time_block / period categoricals
+TIME_BLOCKS = ["Early Morning", "Late Morning", "Afternoon", "Evening", "Night"]
+PERIODS = ["AM", "PM"]
+
+# Hours at which a new block starts, and the block code of each interval:
+# [0, 5) Night, [5, 9) Early Morning, ..., [17, 21) Evening, [21, 24) Night
+_TIME_BLOCK_STARTS = np.array([5, 9, 12, 17, 21])
+_TIME_BLOCK_BY_INTERVAL = np.array([4, 0, 1, 2, 3, 4], dtype=np.int8)
+
+
+def time_block_codes(hours) -> np.ndarray:
+    """
+    Vectorized get_time_block, returning codes into TIME_BLOCKS.
+
+    Args:
+        hours (array-like): Hours (0-23)
+
+    Returns:
+        np.ndarray: int8 codes, one per hour
+    """
+    intervals = np.searchsorted(_TIME_BLOCK_STARTS, np.asarray(hours), side="right")
+    return _TIME_BLOCK_BY_INTERVAL[intervals]
+
+
+def period_codes(hours) -> np.ndarray:
+    """
+    Vectorized get_period, returning codes into PERIODS.
+
+    Args:
+        hours (array-like): Hours (0-23)
+
+    Returns:
+        np.ndarray: int8 codes, one per hour
+    """
+    return (np.asarray(hours) >= 12).astype(np.int8)
+
+
+def get_time_blocks(hours):
+    """
+    Convert a Series or array of hours into time blocks.
+
+    Returns:
+        pd.Series | pd.Categorical: Categorical time blocks; a Series with
+            the same index when given a Series
+    """
+    blocks = pd.Categorical.from_codes(time_block_codes(hours), TIME_BLOCKS)
+    if isinstance(hours, pd.Series):
+        return pd.Series(blocks, index=hours.index, name="time_block")
+    return blocks
+
+
+def get_periods(hours):
+    """
+    Convert a Series or array of hours into AM/PM periods.
+
+    Returns:
+        pd.Series | pd.Categorical: Categorical periods; a Series with the
+            same index when given a Series
+    """
+    periods = pd.Categorical.from_codes(period_codes(hours), PERIODS)
+    if isinstance(hours, pd.Series):
+        return pd.Series(periods, index=hours.index, name="period")
+    return periods
+
+# =================================
+# Display timezone
+# =================================
+
+# Stored timestamps are treated as UTC and shown in this timezone
+DISPLAY_TIMEZONE = os.environ.get("TIME_TRACKER_TIMEZONE", "Asia/Manila")
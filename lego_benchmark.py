@@ -0,0 +1,148 @@
+"""
+Benchmark of the LEGO inventory grid's page reads and writes.
+
+Fills a throwaway store with synthetic items, then times one page of
+every "View by" order at the start, middle and end of the inventory,
+next to the old approach of copying and sorting the whole DataFrame
+for every rerun. Writes that move an item within the views are timed
+too, since they also update the view indexes.
+
+Usage (from the repository root):
+    python lego_benchmark.py                    # 100,000 items
+    python lego_benchmark.py --items 10000 --output lego_benchmark.json
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+import pandas as pd
+import lego_store
+from lego_store import VIEW_ORDER, add_item, add_items, delete_item, load_items, load_page, update_item
+
+ITEMS_PER_PAGE = 12
+
+# Writes timed per measurement
+WRITE_CALLS = 50
+
+# Sort of the pre-store grid, per view: (column, ascending)
+FRAME_SORT = {
+    "Series": ("Series", True),
+    "Purchase Date (latest)": ("Purchase Date", False),
+    "Purchase Price": ("Purchase Price", False),
+    "Status": ("Status", True),
+}
+
+
+def make_items(count: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic items with repeated series, dates and prices, like a real collection."""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Item Name": [f"Minifigure {i}" for i in range(count)],
+        "Series": [f"Series {rng.randrange(40)}" if i % 50 else None for i in range(count)],
+        "Purchase Date": [
+            date(2019 + rng.randrange(6), 1 + rng.randrange(12), 1 + rng.randrange(28))
+            for _ in range(count)
+        ],
+        "Purchase Price": [float(rng.randrange(5, 120)) for _ in range(count)],
+        "Resale Price": [float(rng.randrange(5, 200)) for _ in range(count)],
+        "Status": [rng.choice(["Available", "Sold"]) for _ in range(count)],
+    })
+
+
+def best_of(func, repeat: int) -> float:
+    """Fastest of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def frame_page(df: pd.DataFrame, view: str, offset: int) -> pd.DataFrame:
+    """One page the way the grid built it before the store: copy, sort, slice."""
+    df_display = df.copy()
+    if view in FRAME_SORT:
+        column, ascending = FRAME_SORT[view]
+        df_display = df_display.sort_values(column, ascending=ascending)
+    return df_display.iloc[offset:offset + ITEMS_PER_PAGE]
+
+
+def run(count: int, repeat: int) -> dict[str, float]:
+    """
+    Time every step against `count` items in a temporary data directory.
+
+    Returns:
+        dict[str, float]: Best time of each step, in seconds
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        lego_store.DATA_DIR = Path(tmp)
+        add_items(make_items(count))
+        frame = load_items()
+
+        offsets = {"first": 0, "middle": count // 2, "last": max(count - ITEMS_PER_PAGE, 0)}
+        for view in VIEW_ORDER:
+            for where, offset in offsets.items():
+                timings[f"page {view} ({where})"] = best_of(
+                    lambda: load_page(view, offset, ITEMS_PER_PAGE), repeat
+                )
+            timings[f"frame sort {view} (middle)"] = best_of(
+                lambda: frame_page(frame, view, offsets["middle"]), repeat
+            )
+
+        # Writes: mean per call, each moving an item within every view
+        rng = random.Random(1)
+        new_ids = []
+
+        def add():
+            for i in range(WRITE_CALLS):
+                new_ids.append(add_item({
+                    "Item Name": f"New {i}", "Series": "Series 0", "Status": "Available",
+                    "Purchase Date": date(2024, 1, 1), "Purchase Price": 30.0,
+                }))
+
+        def edit():
+            for item_id in rng.sample(range(1, count + 1), WRITE_CALLS):
+                update_item(item_id, {"Purchase Price": float(rng.randrange(5, 120))})
+
+        def remove():
+            for _ in range(WRITE_CALLS):
+                delete_item(new_ids.pop())
+
+        timings["add_item"] = best_of(add, 1) / WRITE_CALLS
+        timings["update_item"] = best_of(edit, repeat) / WRITE_CALLS
+        timings["delete_item"] = best_of(remove, 1) / WRITE_CALLS
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the LEGO inventory page reads and writes.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"Filling a store with {args.items} items...", file=sys.stderr)
+    timings = run(args.items, args.repeat)
+
+    for step, seconds in timings.items():
+        print(f"{step:<42} {seconds * 1000:>10.2f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "items": args.items,
+            "repeat": args.repeat,
+            "pandas": pd.__version__,
+            "results": timings,
+        }, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
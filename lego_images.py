@@ -0,0 +1,184 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image, ImageOps, features
+from lego_store import DATA_DIR, image_path
+
+# =================================
+# LEGO image thumbnails
+# =================================
+#
+# The grid and the details panel show images at fixed widths, so they get
+# pre-sized thumbnails instead of the uploaded files. Each thumbnail is
+# made once (right after an upload, or on first view for older images)
+# and then served from two LRU caches bounded by size: encoded bytes in
+# memory, and files on disk under lego_data/thumbs.
+#
+# Thumbnails are keyed by the image digest like the originals, so they
+# never go stale; those of removed images simply age out of the caches.
+
+# Size -> longest edge in pixels, twice the display width for sharp
+# rendering on high-density screens
+THUMB_SIZES = {
+    "grid": 240,
+    "detail": 440,
+}
+
+# WebP when Pillow was built with it, JPEG otherwise
+THUMB_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMB_QUALITY = int(os.environ.get("LEGO_THUMB_QUALITY", 80))
+
+# Cache budgets
+THUMB_DISK_BYTES = int(os.environ.get("LEGO_THUMB_DISK_MB", 256)) * 1024 * 1024
+THUMB_MEMORY_BYTES = int(os.environ.get("LEGO_THUMB_MEMORY_MB", 32)) * 1024 * 1024
+
+THUMB_DIR_NAME = "thumbs"
+
+_memory: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+_memory_bytes = 0
+_memory_lock = threading.Lock()
+
+# Bytes of thumbnails on disk, scanned on first write
+_disk_bytes: int | None = None
+_disk_lock = threading.Lock()
+
+
+def thumb_path(digest: str, size: str) -> Path:
+    """File holding the `size` thumbnail of an image."""
+    suffix = "webp" if THUMB_FORMAT == "WEBP" else "jpg"
+    return DATA_DIR / THUMB_DIR_NAME / size / digest[:2] / f"{digest}.{suffix}"
+
+
+def thumbnail(digest: str, size: str = "grid") -> bytes | None:
+    """
+    Pre-sized thumbnail of a stored image, for st.image.
+
+    Args:
+        digest (str): Image digest from the item row
+        size (str): A key of THUMB_SIZES
+
+    Returns:
+        bytes | None: Encoded thumbnail, or None if the original is missing
+            or is not a readable image
+    """
+    key = (digest, size)
+    cached = _memory_get(key)
+    if cached is not None:
+        return cached
+
+    path = thumb_path(digest, size)
+    try:
+        data = path.read_bytes()
+        # Recently used files are the last to be evicted from disk
+        os.utime(path)
+    except FileNotFoundError:
+        data = _make_thumbnail(digest, size)
+        if data is None:
+            return None
+
+    _memory_put(key, data)
+    return data
+
+
+def make_thumbnails(digest: str) -> None:
+    """Make every thumbnail size of a new image, so its first view is cheap."""
+    for size in THUMB_SIZES:
+        if not thumb_path(digest, size).exists():
+            _make_thumbnail(digest, size)
+
+
+def _make_thumbnail(digest: str, size: str) -> bytes | None:
+    """Resize the original, encode it and store it in the disk cache."""
+    try:
+        with Image.open(image_path(digest)) as original:
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail((THUMB_SIZES[size], THUMB_SIZES[size]))
+
+        # Encoders only take a few modes (not e.g. 16-bit grayscale, CMYK
+        # for WebP or palettes); JPEG has no alpha
+        if THUMB_FORMAT == "JPEG" or image.mode not in ("RGB", "RGBA", "L"):
+            has_alpha = image.has_transparency_data
+            image = image.convert("RGBA" if has_alpha and THUMB_FORMAT != "JPEG" else "RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, THUMB_FORMAT, quality=THUMB_QUALITY)
+        data = buffer.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Missing, unreadable or too large to decode: shown as no image
+        return None
+
+    path = thumb_path(digest, size)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    _disk_added(len(data))
+    return data
+
+
+# =================================
+# Caches
+# =================================
+
+def _memory_get(key: tuple[str, str]) -> bytes | None:
+    with _memory_lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+        return data
+
+
+def _memory_put(key: tuple[str, str], data: bytes) -> None:
+    global _memory_bytes
+    with _memory_lock:
+        if key in _memory:
+            return
+        _memory[key] = data
+        _memory_bytes += len(data)
+        while _memory_bytes > THUMB_MEMORY_BYTES and _memory:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+
+
+def _disk_added(count: int) -> None:
+    """Account for a new thumbnail file and evict old ones over the budget."""
+    global _disk_bytes
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = sum(size for _, _, size in _disk_files())
+        else:
+            _disk_bytes += count
+        if _disk_bytes > THUMB_DISK_BYTES:
+            # Down to 90%, so the directory is not rescanned on every write
+            _disk_bytes = _evict_disk(THUMB_DISK_BYTES * 9 // 10)
+
+
+def _disk_files() -> list[tuple[float, Path, int]]:
+    """(last use, path, bytes) of every thumbnail file."""
+    files = []
+    for path in (DATA_DIR / THUMB_DIR_NAME).rglob("*.*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.suffix != ".tmp":
+            files.append((stat.st_mtime, path, stat.st_size))
+    return files
+
+
+def _evict_disk(budget: int) -> int:
+    """
+    Delete least recently used thumbnail files until they fit in `budget`.
+
+    Returns:
+        int: Bytes left on disk
+    """
+    files = sorted(_disk_files())
+    total = sum(size for _, _, size in files)
+    for _, path, size in files:
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    return total
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+import streamlit as st
+
+# =================================
+# LEGO app profiler
+# =================================
+#
+# Opt-in: LEGO_PROFILE=1 streamlit run legoinventorymanager.py
+#
+# Spans time the sorting, aggregations and charts of each rerun and the
+# memory they add. They are listed in a sidebar panel and can be
+# downloaded in the Chrome trace format (chrome://tracing, Perfetto).
+# When profiling is off, profiled() is a shared no-op context.
+#
+# A single-threaded counterpart of Time Tracker/utils/profiling.py, with
+# the same span fields and trace layout. It is not shared: the two apps
+# have separate import roots, and the Time Tracker's top-level packages
+# (core, utils, ui) are not importable from this one.
+
+PROFILING = os.environ.get("LEGO_PROFILE", "0") == "1"
+
+# Reruns kept for the trace download
+PROFILE_HISTORY = 20
+
+_NO_SPAN = nullcontext()
+
+
+def memory_bytes():
+    """Resident set size in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def start_profile_run():
+    """Start recording this rerun's spans, once at the top of the script."""
+    if PROFILING:
+        st.session_state.profile_run = {
+            "wall_start": time.time(), "started": time.perf_counter(), "depth": 0, "spans": []
+        }
+
+
+def profiled(name, category="app"):
+    """Record a block as a span of the current rerun when profiling is on."""
+    if not PROFILING:
+        return _NO_SPAN
+    return _profiled_span(name, category)
+
+
+@contextmanager
+def _profiled_span(name, category):
+    run = st.session_state.profile_run
+    memory_start = memory_bytes()
+    started = time.perf_counter()
+    span = {"name": name, "category": category, "depth": run["depth"],
+            "start_ms": (started - run["started"]) * 1000, "duration_ms": 0.0, "memory_delta": None}
+    run["spans"].append(span)
+    run["depth"] += 1
+    try:
+        yield
+    finally:
+        run["depth"] -= 1
+        span["duration_ms"] = (time.perf_counter() - started) * 1000
+        memory_end = memory_bytes()
+        if memory_start is not None and memory_end is not None:
+            span["memory_delta"] = memory_end - memory_start
+
+
+def chrome_trace(runs):
+    """Export profiled reruns as Chrome trace JSON."""
+    pid, tid = os.getpid(), threading.get_ident()
+    events = []
+    for run in runs:
+        base = run["wall_start"] * 1_000_000
+        events.append({"name": "rerun", "cat": "rerun", "ph": "X", "ts": base,
+                       "dur": run["duration_ms"] * 1000, "pid": pid, "tid": tid})
+        for span in run["spans"]:
+            events.append({"name": span["name"], "cat": span["category"], "ph": "X",
+                           "ts": base + span["start_ms"] * 1000, "dur": span["duration_ms"] * 1000,
+                           "pid": pid, "tid": tid, "args": {"memory_delta_bytes": span["memory_delta"]}})
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+def show_profile_panel():
+    """Sidebar table of this rerun's spans, with a trace download; once at the end of the script."""
+    if not PROFILING:
+        return
+
+    run = st.session_state.profile_run
+    run["duration_ms"] = (time.perf_counter() - run["started"]) * 1000
+    history = st.session_state.setdefault("profile_history", [])
+    history.append(run)
+    del history[:-PROFILE_HISTORY]
+
+    with st.sidebar.expander("Profiler", expanded=True):
+        st.caption(f"Last run {run['duration_ms']:.0f} ms")
+        if run["spans"]:
+            st.dataframe(pd.DataFrame({
+                "span": ["  " * span["depth"] + span["name"] for span in run["spans"]],
+                "category": [span["category"] for span in run["spans"]],
+                "ms": [round(span["duration_ms"], 1) for span in run["spans"]],
+                "memory KB": [None if span["memory_delta"] is None else span["memory_delta"] // 1024
+                              for span in run["spans"]],
+            }), hide_index=True, use_container_width=True)
+        st.download_button(f"Download trace ({len(history)} runs)", chrome_trace(history),
+                           "lego_inventory_trace.json", "application/json")
@@ -0,0 +1,376 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator
+import pandas as pd
+
+# =================================
+# LEGO inventory store
+# =================================
+#
+# The inventory lives in a SQLite database (WAL mode), so it survives the
+# session and is shared by every browser tab and worker. The app reads
+# only what it shows: one page of the grid, one item's details, or the
+# columns the analytics need.
+#
+# Images are kept out of the table, in a content-addressed store: each
+# file is named by the SHA-256 of its bytes and rows hold only that
+# digest, so identical uploads are stored once and no query or DataFrame
+# ever carries image bytes.
+#
+# Rows use the app's column names ("Item Name", "Series", ...); the table
+# uses snake_case names, see COLUMNS.
+
+# Directory of the database, resolved from this file rather than the
+# working directory ("lego_data" next to the app unless overridden)
+DATA_DIR = Path(
+    os.environ.get("LEGO_DATA_DIR", Path(__file__).resolve().parent / "lego_data")
+).resolve()
+
+DB_NAME = "inventory.db"
+
+# Image files, in subdirectories named by the first two digest characters
+IMAGE_DIR_NAME = "images"
+
+# App column -> table column
+COLUMNS = {
+    "Item Name": "name",
+    "Series": "series",
+    "Purchase Date": "purchase_date",
+    "Purchase Price": "purchase_price",
+    "Resale Price": "resale_price",
+    "Status": "status",
+    "Image": "image_digest",
+    "Selling Date": "selling_date",
+}
+
+DATE_COLUMNS = ["Purchase Date", "Selling Date"]
+
+# "View by" choice -> ORDER BY; ties keep insertion order like a stable sort.
+# Each order is exactly that of an index in SCHEMA (the table itself for
+# "Default"), which SQLite keeps up to date on every insert, update and
+# delete, so a page is read off the index without sorting the inventory.
+VIEW_ORDER = {
+    "Default": "id",
+    "Series": "series NULLS LAST, id",
+    "Purchase Date (latest)": "purchase_date DESC NULLS LAST, id",
+    "Purchase Price": "purchase_price DESC NULLS LAST, id",
+    "Status": "status NULLS LAST, id",
+}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        series TEXT,
+        purchase_date TEXT,
+        purchase_price REAL,
+        resale_price REAL,
+        status TEXT CHECK (status IN ('Available', 'Sold')),
+        image_digest TEXT,
+        selling_date TEXT
+    );
+
+    -- One index per "View by" order (see VIEW_ORDER); an index on a column
+    -- holds ascending ids within equal values, which the descending views
+    -- need spelled out
+    CREATE INDEX IF NOT EXISTS idx_items_series ON items (series);
+    CREATE INDEX IF NOT EXISTS idx_items_status ON items (status);
+    CREATE INDEX IF NOT EXISTS idx_items_purchase_date_view ON items (purchase_date DESC, id);
+    CREATE INDEX IF NOT EXISTS idx_items_purchase_price_view ON items (purchase_price DESC, id);
+    -- Replaced by the view indexes above
+    DROP INDEX IF EXISTS idx_items_purchase_date;
+    DROP INDEX IF EXISTS idx_items_purchase_price;
+
+    -- Bumped by every write, so readers can cache until it changes
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+
+# After _migrate, which adds image_digest to older databases
+IMAGE_INDEX = "CREATE INDEX IF NOT EXISTS idx_items_image_digest ON items (image_digest)"
+
+_schema_lock = threading.Lock()
+_schema_ready: set[Path] = set()
+
+
+def db_file() -> Path:
+    return DATA_DIR / DB_NAME
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+    """
+    Open the database, creating it on first use.
+    The `with` block is one transaction, committed on success.
+    """
+    path = db_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if path not in _schema_ready:
+                conn.executescript(SCHEMA)
+                _migrate(conn)
+                conn.execute(IMAGE_INDEX)
+                _schema_ready.add(path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _write() -> Iterator[sqlite3.Connection]:
+    """
+    A write transaction holding the database's write lock from the start,
+    so image files are added and removed in step with the rows using them.
+    """
+    with connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        _bump_version(conn)
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Move images stored in the table (image BLOB column) to the image store."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    if "image" not in columns:
+        return
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if "image_digest" not in columns:
+            conn.execute("ALTER TABLE items ADD COLUMN image_digest TEXT")
+        rows = conn.execute("SELECT id, image FROM items WHERE image IS NOT NULL").fetchall()
+        conn.executemany(
+            "UPDATE items SET image_digest = ? WHERE id = ?",
+            [(put_image(image), item_id) for item_id, image in rows],
+        )
+        conn.execute("ALTER TABLE items DROP COLUMN image")
+
+
+# =================================
+# Writes
+# =================================
+
+def add_items(items: pd.DataFrame | Iterable[dict]) -> list[int]:
+    """
+    Insert items in one transaction.
+
+    Args:
+        items (pd.DataFrame | Iterable[dict]): Rows keyed by app column
+            names; missing columns are stored as NULL. "Image" may be
+            image bytes (stored in the image store) or a digest
+
+    Returns:
+        list[int]: Ids of the new items, in order
+    """
+    records = items.to_dict("records") if isinstance(items, pd.DataFrame) else list(items)
+    if not records:
+        return []
+
+    columns = list(COLUMNS.values())
+    query = f"INSERT INTO items ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+    with _write() as conn:
+        ids = [conn.execute(query, _row(record)).lastrowid for record in records]
+    return ids
+
+
+def add_item(item: dict) -> int:
+    """Insert one item and return its id."""
+    return add_items([item])[0]
+
+
+def update_item(item_id: int, changes: dict) -> None:
+    """
+    Write changed fields of one item with a single UPDATE.
+
+    Args:
+        item_id (int): Item id
+        changes (dict): New values keyed by app column names; "Image" may
+            be image bytes or a digest
+    """
+    if not changes:
+        return
+
+    names = [COLUMNS[column] for column in changes]
+    assignments = ", ".join(f"{name} = ?" for name in names)
+
+    with _write() as conn:
+        replaced = _image_digests(conn, [item_id]) if "Image" in changes else []
+        values = [_value(column, value) for column, value in changes.items()]
+        conn.execute(f"UPDATE items SET {assignments} WHERE id = ?", values + [int(item_id)])
+        _release_images(conn, replaced)
+
+
+def delete_item(item_id: int) -> None:
+    """Remove one item, and its image unless another item uses it."""
+    with _write() as conn:
+        images = _image_digests(conn, [item_id])
+        conn.execute("DELETE FROM items WHERE id = ?", (int(item_id),))
+        _release_images(conn, images)
+
+
+def _bump_version(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+
+def _row(record: dict) -> tuple:
+    """Convert a record to parameters in COLUMNS order."""
+    return tuple(_value(column, record.get(column)) for column in COLUMNS)
+
+
+def _value(column: str, value):
+    """Convert one app value to what sqlite3 stores."""
+    if value is None or (not isinstance(value, (bytes, str)) and pd.isna(value)):
+        return None
+    if column == "Image" and isinstance(value, bytes):
+        return put_image(value)
+    if column in DATE_COLUMNS:
+        return value if isinstance(value, str) else pd.Timestamp(value).date().isoformat()
+    if hasattr(value, "item"):
+        # NumPy scalars are not understood by sqlite3
+        return value.item()
+    return value
+
+
+# =================================
+# Image store
+# =================================
+
+def image_digest(data: bytes) -> str:
+    """Content address of image bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_path(digest: str) -> Path:
+    """File holding the image with this digest (st.image accepts the path)."""
+    return DATA_DIR / IMAGE_DIR_NAME / digest[:2] / digest
+
+
+def put_image(data: bytes) -> str:
+    """
+    Store image bytes unless identical bytes are already stored.
+
+    Args:
+        data (bytes): Uploaded image file
+
+    Returns:
+        str: Its digest, to keep in the item row
+    """
+    digest = image_digest(data)
+    path = image_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return digest
+
+
+def _image_digests(conn: sqlite3.Connection, item_ids: list[int]) -> list[str]:
+    """Digests of the images of some items."""
+    rows = conn.execute(
+        f"SELECT image_digest FROM items WHERE image_digest IS NOT NULL "
+        f"AND id IN ({', '.join('?' for _ in item_ids)})",
+        [int(item_id) for item_id in item_ids],
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _release_images(conn: sqlite3.Connection, digests: list[str]) -> None:
+    """Delete image files no item refers to anymore (inside a _write())."""
+    for digest in set(digests):
+        used = conn.execute(
+            "SELECT 1 FROM items WHERE image_digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if used is None:
+            image_path(digest).unlink(missing_ok=True)
+
+
+# =================================
+# Reads
+# =================================
+
+def inventory_version() -> int:
+    """Counter bumped by every write; cache reads on it."""
+    with connect() as conn:
+        return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+def count_items() -> int:
+    with connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def load_page(view: str, offset: int, limit: int) -> pd.DataFrame:
+    """
+    One page of items in a "View by" order.
+
+    The page's ids are read from the view's index alone, then only those
+    rows are fetched, so the cost does not grow with the inventory beyond
+    stepping over `offset` index entries.
+
+    Args:
+        view (str): A key of VIEW_ORDER
+        offset (int): Items to skip
+        limit (int): Page size
+
+    Returns:
+        pd.DataFrame: "id" plus the app columns
+    """
+    order = VIEW_ORDER[view]
+    return _select(
+        f"JOIN (SELECT id AS page_id FROM items ORDER BY {order} LIMIT ? OFFSET ?) "
+        f"ON id = page_id ORDER BY {order}",
+        [int(limit), int(offset)],
+    )
+
+
+def get_item(item_id: int) -> dict | None:
+    """
+    One item.
+
+    Returns:
+        dict | None: "id" plus the app columns, or None if it is gone
+    """
+    rows = _select("WHERE id = ?", [int(item_id)])
+    return None if rows.empty else rows.iloc[0].to_dict()
+
+
+def load_items() -> pd.DataFrame:
+    """
+    Every item, for the analytics.
+
+    Returns:
+        pd.DataFrame: "id" plus the app columns ("Image" holds digests)
+    """
+    return _select("ORDER BY id", [])
+
+
+def _select(clause: str, params: list) -> pd.DataFrame:
+    """Run a SELECT on items and convert the rows to app columns and types."""
+    columns = list(COLUMNS)
+    names = ", ".join(["id"] + [COLUMNS[column] for column in columns])
+
+    with connect() as conn:
+        rows = conn.execute(f"SELECT {names} FROM items {clause}", params).fetchall()
+
+    df = pd.DataFrame(rows, columns=["id"] + columns)
+    for column in DATE_COLUMNS:
+        if column in df:
+            # date objects like the form inputs produce; missing dates are NA
+            df[column] = pd.Series(
+                [pd.NA if pd.isna(value) else date.fromisoformat(value) for value in df[column]],
+                index=df.index, dtype=object,
+            )
+    return df
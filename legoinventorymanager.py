@@ -1,17 +1,27 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
-import io
 from datetime import date
+from lego_store import (
+    VIEW_ORDER,
+    add_item,
+    add_items,
+    count_items,
+    delete_item,
+    get_item,
+    image_digest,
+    inventory_version,
+    load_items,
+    load_page,
+    update_item,
+)
+from lego_images import make_thumbnails, thumbnail
+from lego_profiling import profiled, show_profile_panel, start_profile_run
 
 # -------------------------
 # Initialize Session State
 # -------------------------
-if "inventory" not in st.session_state:
-    st.session_state.inventory = pd.DataFrame(columns=[
-        "Item Name","Series","Purchase Date","Purchase Price",
-        "Resale Price","Status","Image","Selling Date"
-    ])
+# The inventory itself is in lego_store; the session only remembers what
+# is on screen (the selected item's id and the page)
 if "selected_item" not in st.session_state:
     st.session_state.selected_item = None
 if "page" not in st.session_state:
@@ -19,58 +29,69 @@ if "page" not in st.session_state:
 
 ITEMS_PER_PAGE = 10
 
+start_profile_run()
+
+
+def form_value(value):
+    """A stored value as a widget default: None (an empty field) when missing."""
+    return None if pd.isna(value) else value
+
+
+def changed(old, new) -> bool:
+    """Whether an edited value differs from the stored one (missing on both sides is unchanged)."""
+    if pd.isna(old) or pd.isna(new):
+        return not (pd.isna(old) and pd.isna(new))
+    return bool(old != new)
+
+
+def dirty_fields(item: dict, edits: dict) -> dict:
+    """Edited values that differ from the stored item, keyed by column."""
+    return {column: value for column, value in edits.items() if changed(item[column], value)}
+
+
 # -------------------------
 # Function to display inventory
 # -------------------------
 def display_inventory():
-    if st.session_state.inventory.empty:
+    total_items = count_items()
+    if total_items == 0:
         st.info("No items in inventory. Add items in the 'Add Item' tab.")
         return
 
     # --- Sorting / Filtering ---
     st.subheader("Filter / Sort Inventory")
-    view_by = st.selectbox(
-        "View by",
-        ["Default", "Series", "Purchase Date (latest)", "Purchase Price", "Status"]
-    )
-
-    df_display = st.session_state.inventory.copy()
-
-    if view_by == "Series":
-        df_display = df_display.sort_values("Series")
-    elif view_by == "Purchase Date (latest)":
-        df_display = df_display.sort_values("Purchase Date", ascending=False)
-    elif view_by == "Purchase Price":
-        df_display = df_display.sort_values("Purchase Price", ascending=False)
-    elif view_by == "Status":
-        df_display = df_display.sort_values("Status")
+    view_by = st.selectbox("View by", list(VIEW_ORDER))
 
     # --- Pagination ---
-    total_pages = (len(df_display) - 1) // ITEMS_PER_PAGE + 1
-    start_idx = st.session_state.page * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-    df_page = df_display.iloc[start_idx:end_idx]
+    # Only this page is read; the store sorts through its indexes
+    total_pages = (total_items - 1) // ITEMS_PER_PAGE + 1
+    st.session_state.page = min(st.session_state.page, total_pages - 1)
+    with profiled(f"load page by {view_by}", "storage"):
+        df_page = load_page(view_by, st.session_state.page * ITEMS_PER_PAGE, ITEMS_PER_PAGE)
 
     st.subheader(f"Minifigures (Page {st.session_state.page + 1} of {total_pages})")
     cols = st.columns(4)
 
-    for i, (idx, row) in enumerate(df_page.iterrows()):
-        with cols[i % 4]:
-            # SELECT BUTTON (restore details)
-            if st.button(row["Item Name"], key=f"select_{idx}", use_container_width=True):
-                st.session_state.selected_item = idx
-
-            # Image preview
-            if row["Image"] is not None and not (isinstance(row["Image"], float) and pd.isna(row["Image"])):
-                st.image(io.BytesIO(row["Image"]), width=120)
-            else:
-                st.caption("No Image")
-
-            # REMOVE BUTTON
-            if st.button("❌ Remove", key=f"remove_{idx}"):
-                st.session_state.inventory = st.session_state.inventory.drop(idx).reset_index(drop=True)
-                st.session_state.selected_item = None
-                st.rerun()
+    with profiled("inventory grid", "render"):
+        for i, row in enumerate(df_page.to_dict("records")):
+            item_id = row["id"]
+            with cols[i % 4]:
+                # SELECT BUTTON (restore details)
+                if st.button(row["Item Name"], key=f"select_{item_id}", use_container_width=True):
+                    st.session_state.selected_item = item_id
+
+                # Image preview
+                thumb = thumbnail(row["Image"], "grid") if isinstance(row["Image"], str) else None
+                if thumb is not None:
+                    st.image(thumb, width=120)
+                else:
+                    st.caption("No Image")
+
+                # REMOVE BUTTON
+                if st.button("❌ Remove", key=f"remove_{item_id}"):
+                    delete_item(item_id)
+                    st.session_state.selected_item = None
+                    st.rerun()
 
     # --- Pagination Controls ---
     col_prev, col_next = st.columns(2)
@@ -84,10 +105,10 @@ def display_inventory():
     # -------------------------
     if st.session_state.selected_item is not None:
         idx = st.session_state.selected_item
-        if idx >= len(st.session_state.inventory):
+        item = get_item(idx)
+        if item is None:
             st.session_state.selected_item = None
             return
-        item = st.session_state.inventory.loc[idx]
 
         st.divider()
         st.subheader(f"Details: {item['Item Name']}")
@@ -100,73 +121,93 @@ def display_inventory():
             key=f"image_upload_{idx}"
         )
         if uploaded_image is not None:
-            img_bytes = uploaded_image.read()
-            st.session_state.inventory.at[idx, "Image"] = img_bytes
+            img_bytes = uploaded_image.getvalue()
+            digest = image_digest(img_bytes)
+            if digest != item["Image"]:
+                update_item(idx, {"Image": img_bytes})
+                make_thumbnails(digest)
+                item["Image"] = digest
             st.success("✅ Image updated successfully!")
 
         # Show current image
-        if item["Image"] is not None and not (isinstance(item["Image"], float) and pd.isna(item["Image"])):
-            st.image(Image.open(io.BytesIO(item["Image"])), width=220)
+        thumb = thumbnail(item["Image"], "detail") if isinstance(item["Image"], str) else None
+        if thumb is not None:
+            st.image(thumb, width=220)
         else:
             st.caption("No image available")
 
-        # --- Editable Series ---
-        new_series = st.text_input(
-            "Series",
-            value=item["Series"],
-            key=f"series_{idx}"
-        )
-        st.session_state.inventory.at[idx, "Series"] = new_series
-
-        # --- Editable Purchase Date ---
-        new_purchase_date = st.date_input(
-            "Purchase Date",
-            value=item["Purchase Date"],
-            key=f"purchase_date_{idx}"
-        )
-        st.session_state.inventory.at[idx, "Purchase Date"] = new_purchase_date
-
-        # --- Editable Purchase Price ---
-        new_purchase_price = st.number_input(
-            "Purchase Price",
-            value=float(item["Purchase Price"]),
-            step=0.01,
-            key=f"purchase_price_{idx}"
-        )
-        st.session_state.inventory.at[idx, "Purchase Price"] = new_purchase_price
-
-        # --- Editable Resale Price ---
-        new_resale = st.number_input(
-            "Resale Price",
-            value=float(item["Resale Price"]),
-            step=0.01,
-            key=f"resale_{idx}"
-        )
-        st.session_state.inventory.at[idx, "Resale Price"] = new_resale
-
-        # --- Editable Status ---
-        new_status = st.selectbox(
-            "Status",
-            ["Available", "Sold"],
-            index=0 if item["Status"] == "Available" else 1,
-            key=f"status_{idx}"
-        )
-        if new_status != item["Status"]:
-            st.session_state.inventory.at[idx, "Status"] = new_status
-            if new_status == "Sold" and pd.isna(item["Selling Date"]):
-                st.session_state.inventory.at[idx, "Selling Date"] = date.today()
-
-        # --- Editable Selling Date ---
+        # --- Editable fields ---
+        # The form buffers edits until "Save changes"; only the fields that
+        # differ from the stored item are then written, in one update
         current_selling_date = item["Selling Date"]
         default_selling_date = date.today() if pd.isna(current_selling_date) else current_selling_date
 
-        new_selling_date = st.date_input(
-            "Selling Date",
-            value=default_selling_date,
-            key=f"selling_date_{idx}"
-        )
-        st.session_state.inventory.at[idx, "Selling Date"] = new_selling_date
-        st.write(f"**Selling Date:** {new_selling_date}")
+        with st.form(key=f"edit_{idx}"):
+            new_series = st.text_input(
+                "Series",
+                value=form_value(item["Series"]),
+                key=f"series_{idx}"
+            )
+            new_purchase_date = st.date_input(
+                "Purchase Date",
+                value=form_value(item["Purchase Date"]),
+                key=f"purchase_date_{idx}"
+            )
+            new_purchase_price = st.number_input(
+                "Purchase Price",
+                value=form_value(item["Purchase Price"]),
+                step=0.01,
+                key=f"purchase_price_{idx}"
+            )
+            new_resale = st.number_input(
+                "Resale Price",
+                value=form_value(item["Resale Price"]),
+                step=0.01,
+                key=f"resale_{idx}"
+            )
+            new_status = st.selectbox(
+                "Status",
+                ["Available", "Sold"],
+                index={"Available": 0, "Sold": 1}.get(item["Status"]),
+                key=f"status_{idx}"
+            )
+            new_selling_date = st.date_input(
+                "Selling Date",
+                value=default_selling_date,
+                key=f"selling_date_{idx}"
+            )
+            saved = st.form_submit_button("💾 Save changes")
+
+        if saved:
+            changes = dirty_fields(item, {
+                "Series": new_series,
+                "Purchase Date": new_purchase_date,
+                "Purchase Price": new_purchase_price,
+                "Resale Price": new_resale,
+                "Status": new_status,
+            })
+            # An unset selling date is shown as today; store it when the
+            # item is sold or the date was picked
+            if new_selling_date != default_selling_date or (
+                new_status == "Sold" and pd.isna(current_selling_date)
+            ):
+                changes["Selling Date"] = new_selling_date
+
+            if changes:
+                update_item(idx, changes)
+                item.update(changes)
+                st.success(f"✅ Saved {', '.join(changes)}")
+            else:
+                st.info("No changes to save.")
+
+        selling_date = item["Selling Date"]
+        st.write(f"**Selling Date:** {'Not sold' if pd.isna(selling_date) else selling_date}")
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_analytics_inventory(version: int) -> pd.DataFrame:
+    """Inventory for the analytics, reread when `version` changes."""
+    return load_items()
+
 
 # -------------------------
 # Tabs
@@ -177,7 +218,7 @@ tab1, tab2, tab3 = st.tabs(["🧱Inventory Tracker", "➕Add Item", "📊 Analyt
 # =========================
 # TAB 2: Add Item
 # =========================
-with tab2:
+with tab2, profiled("Add Item", "view"):
     st.header("➕ Add Item")
 
     # --- Initialize session state for inputs if not already ---
@@ -226,11 +267,10 @@ with tab2:
                 "Selling Date": selling_date
             }
 
-            # Append to inventory
-            st.session_state.inventory = pd.concat(
-                [st.session_state.inventory, pd.DataFrame([new_row])],
-                ignore_index=True
-            )
+            # Insert into the store
+            add_item(new_row)
+            if img_bytes:
+                make_thumbnails(image_digest(img_bytes))
 
             # --- SUCCESS MESSAGE ---
             st.success(f"✅ '{st.session_state.name_input}' added to inventory!")
@@ -270,7 +310,8 @@ with tab2:
 
     if csv_file is not None:
         try:
-            df_csv = pd.read_csv(csv_file)
+            with profiled("read bulk CSV", "storage"):
+                df_csv = pd.read_csv(csv_file)
 
             required_cols = [
                 "Item Name",
@@ -308,10 +349,8 @@ with tab2:
                 ]
 
                 if st.button("✅ Confirm Bulk Add"):
-                    st.session_state.inventory = pd.concat(
-                        [st.session_state.inventory, df_csv],
-                        ignore_index=True
-                    )
+                    with profiled("insert bulk rows", "storage"):
+                        add_items(df_csv)
 
                     st.success(f"📦 {len(df_csv)} items added successfully!")
 
@@ -326,35 +365,32 @@ with tab2:
 # TAB 1: Inventory Tracker
 # Display inventory AFTER any add
 # =========================
-with tab1:
+with tab1, profiled("Inventory Tracker", "view"):
     st.header("🧱 Inventory Tracker")
     display_inventory()
 
 # =========================
 # TAB 3: Analytics
 # =========================
-with tab3:
-    st.header("📊 Inventory Analytics")
-
-    df = st.session_state.inventory.copy()
-
-    if df.empty:
-        st.info("No data yet. Add items to see analytics.")
-        st.stop()
+def show_analytics(df: pd.DataFrame):
+    """Metrics and charts of a non-empty inventory."""
+    # Both pie charts need it, whichever of them is drawn
+    import matplotlib.pyplot as plt
 
     # -------------------------
     # SPLIT DATA
     # -------------------------
-    sold_df = df[df["Status"] == "Sold"].copy()
-    available_df = df[df["Status"] == "Available"].copy()
-
-    # -------------------------
-    # SUMMARY METRICS
-    # -------------------------
-    total_sales = sold_df["Resale Price"].sum()
-    total_expenses = df["Purchase Price"].sum()
-    unrealized_sales = available_df["Resale Price"].sum()
-    unrealized_profit = unrealized_sales - available_df["Purchase Price"].sum()
+    with profiled("summary metrics", "aggregate"):
+        sold_df = df[df["Status"] == "Sold"].copy()
+        available_df = df[df["Status"] == "Available"].copy()
+
+        # -------------------------
+        # SUMMARY METRICS
+        # -------------------------
+        total_sales = sold_df["Resale Price"].sum()
+        total_expenses = df["Purchase Price"].sum()
+        unrealized_sales = available_df["Resale Price"].sum()
+        unrealized_profit = unrealized_sales - available_df["Purchase Price"].sum()
 
     # Total Percent Gain (including unrealized gains)
     total_percent_gain = ((total_sales + unrealized_sales - total_expenses) / total_expenses * 100) if total_expenses > 0 else 0.0
@@ -384,20 +420,21 @@ with tab3:
     if sold_df.empty:
         st.warning("No sold items yet.")
     else:
-        sold_df["Profit"] = sold_df["Resale Price"] - sold_df["Purchase Price"]
-
-        series_roi = (
-            sold_df
-            .groupby("Series")
-            .agg(
-                Total_Cost=("Purchase Price", "sum"),
-                Total_Profit=("Profit", "sum")
+        with profiled("series ROI", "aggregate"):
+            sold_df["Profit"] = sold_df["Resale Price"] - sold_df["Purchase Price"]
+
+            series_roi = (
+                sold_df
+                .groupby("Series")
+                .agg(
+                    Total_Cost=("Purchase Price", "sum"),
+                    Total_Profit=("Profit", "sum")
+                )
+                .reset_index()
             )
-            .reset_index()
-        )
 
-        series_roi["Percent Gain (%)"] = (series_roi["Total_Profit"] / series_roi["Total_Cost"] * 100)
-        series_roi = series_roi.sort_values("Percent Gain (%)", ascending=False)
+            series_roi["Percent Gain (%)"] = (series_roi["Total_Profit"] / series_roi["Total_Cost"] * 100)
+            series_roi = series_roi.sort_values("Percent Gain (%)", ascending=False)
 
         st.dataframe(
             series_roi.style.format({
@@ -408,7 +445,8 @@ with tab3:
             use_container_width=True
         )
 
-        st.bar_chart(series_roi.set_index("Series")["Percent Gain (%)"])
+        with profiled("series ROI chart", "chart"):
+            st.bar_chart(series_roi.set_index("Series")["Percent Gain (%)"])
 
     st.divider()
 
@@ -470,19 +508,21 @@ with tab3:
     # -------------------------
     st.subheader("💸 Cash Flow Over Time")
 
-    cash_out = df[["Purchase Date", "Purchase Price"]].copy()
-    cash_out["Amount"] = -cash_out["Purchase Price"]
-    cash_out.rename(columns={"Purchase Date": "Date"}, inplace=True)
+    with profiled("cash flow", "aggregate"):
+        cash_out = df[["Purchase Date", "Purchase Price"]].copy()
+        cash_out["Amount"] = -cash_out["Purchase Price"]
+        cash_out.rename(columns={"Purchase Date": "Date"}, inplace=True)
 
-    cash_in = sold_df[["Selling Date", "Resale Price"]].copy()
-    cash_in.rename(columns={"Selling Date": "Date", "Resale Price": "Amount"}, inplace=True)
+        cash_in = sold_df[["Selling Date", "Resale Price"]].copy()
+        cash_in.rename(columns={"Selling Date": "Date", "Resale Price": "Amount"}, inplace=True)
 
-    cashflow_df = pd.concat([cash_out[["Date", "Amount"]], cash_in])
-    cashflow_df["Date"] = pd.to_datetime(cashflow_df["Date"])
-    cashflow_df = cashflow_df.sort_values("Date")
-    cashflow_df["Cumulative Cash Flow"] = cashflow_df["Amount"].cumsum()
+        cashflow_df = pd.concat([cash_out[["Date", "Amount"]], cash_in])
+        cashflow_df["Date"] = pd.to_datetime(cashflow_df["Date"])
+        cashflow_df = cashflow_df.sort_values("Date")
+        cashflow_df["Cumulative Cash Flow"] = cashflow_df["Amount"].cumsum()
 
-    st.line_chart(cashflow_df.set_index("Date")["Cumulative Cash Flow"])
+    with profiled("cash flow chart", "chart"):
+        st.line_chart(cashflow_df.set_index("Date")["Cumulative Cash Flow"])
 
     st.divider()
 
@@ -494,7 +534,6 @@ with tab3:
     if not sold_df.empty:
         sales_by_series = sold_df.groupby("Series")["Resale Price"].sum()
 
-        import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
         ax.pie(
             sales_by_series,
@@ -504,7 +543,8 @@ with tab3:
         )
         ax.set_title("Revenue Share by Series")
         ax.axis("equal")
-        st.pyplot(fig)
+        with profiled("sales pie chart", "chart"):
+            st.pyplot(fig)
 
     st.divider()
 
@@ -537,7 +577,8 @@ with tab3:
             )
             ax.set_title("Capital Tied Up in Unsold Inventory")
             ax.axis("equal")
-            st.pyplot(fig)
+            with profiled("unsold pie chart", "chart"):
+                st.pyplot(fig)
     else:
         st.info("No unsold items in inventory.")
     # -------------------------
@@ -580,3 +621,20 @@ with tab3:
     else:
         st.info("No available minifigures at the moment.")
 
+
+with tab3, profiled("Analytics", "view"):
+    st.header("📊 Inventory Analytics")
+
+    with profiled("load inventory", "storage"):
+        df = load_analytics_inventory(inventory_version())
+
+    # No st.stop() here: the profiler panel below must still render
+    if df.empty:
+        st.info("No data yet. Add items to see analytics.")
+    else:
+        show_analytics(df)
+
+# -------------------------
+# Profiler panel (LEGO_PROFILE=1)
+# -------------------------
+show_profile_panel()